@@ -0,0 +1,293 @@
+from typing import List, Dict, Optional, Iterable
+from datetime import datetime
+import numpy as np
+
+# Scores are on a 1-10 scale, so the largest possible disagreement is 9
+MAX_SCORE_SPREAD = 9.0
+
+STATS_DOC_ID = "persona_stats"
+
+COMPLETED_MATCH = {"$match": {"status": "completed", "final_report": {"$ne": None}}}
+
+# One row per analysed idea: the proposer and the panel's scores. Ideas whose
+# scores all failed to parse have no average and are left out.
+IDEA_SCORES_PIPELINE = [
+    COMPLETED_MATCH,
+    {"$unwind": "$ideas"},
+    {"$match": {"ideas.scores.score": {"$type": "number"}}},
+    {"$project": {
+        "_id": 0,
+        "proposer": "$ideas.persona_id",
+        "average_score": "$ideas.average_score",
+        "scores": {
+            "$map": {
+                "input": "$ideas.scores",
+                "as": "s",
+                "in": {"persona_id": "$$s.persona_id", "score": "$$s.score"}
+            }
+        }
+    }}
+]
+
+WINS_PIPELINE = [
+    COMPLETED_MATCH,
+    {"$group": {"_id": "$final_report.winning_idea.persona_id", "wins": {"$sum": 1}}}
+]
+
+# How many completed meetings each persona sat on. Meetings from before panels
+# were stored count their proposers.
+PANEL_PIPELINE = [
+    COMPLETED_MATCH,
+    {"$project": {"panel": {"$ifNull": ["$personas", "$ideas.persona_id"]}}},
+    {"$unwind": "$panel"},
+    {"$group": {"_id": "$panel", "meetings": {"$sum": 1}}}
+]
+
+
+def order_persona_ids(persona_ids: Iterable[str], known_order: List[str]) -> List[str]:
+    """Known personas in roster order, followed by any retired ones alphabetically"""
+    seen = set(persona_ids)
+    ordered = [pid for pid in known_order if pid in seen]
+    return ordered + sorted(seen - set(ordered))
+
+
+def build_score_matrix(idea_rows: List[Dict], persona_ids: List[str]) -> np.ndarray:
+    """Ideas x personas matrix of scores, NaN where a persona did not score an idea"""
+    index = {pid: i for i, pid in enumerate(persona_ids)}
+    matrix = np.full((len(idea_rows), len(persona_ids)), np.nan)
+    for row, idea in enumerate(idea_rows):
+        for entry in idea.get('scores', []):
+            col = index.get(entry.get('persona_id'))
+            if col is not None and entry.get('score') is not None:
+                matrix[row, col] = float(entry['score'])
+    return matrix
+
+
+def pairwise_sums(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """Co-scored idea counts and summed absolute score differences for every persona pair"""
+    valid = ~np.isnan(matrix)
+    filled = np.where(valid, matrix, 0.0)
+    weights = valid.astype(float)
+    pair_count = weights.T @ weights
+    diffs = np.abs(filled[:, :, None] - filled[:, None, :])
+    both = valid[:, :, None] & valid[:, None, :]
+    abs_diff = np.where(both, diffs, 0.0).sum(axis=0)
+    return {"pair_count": pair_count, "abs_diff": abs_diff}
+
+
+def agreement_from_sums(pair_count: np.ndarray, abs_diff: np.ndarray) -> np.ndarray:
+    """1 - mean absolute difference / 9; NaN for pairs that never scored the same idea"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        agreement = 1.0 - abs_diff / (pair_count * MAX_SCORE_SPREAD)
+    agreement[pair_count == 0] = np.nan
+    return np.round(agreement, 4)
+
+
+def _matrix_to_json(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    return [[None if np.isnan(v) else float(v) for v in row] for row in matrix]
+
+
+def has_numeric_score(idea: Dict) -> bool:
+    return any(isinstance(s.get('score'), (int, float)) for s in idea.get('scores') or [])
+
+
+def meeting_panel(meeting: Dict) -> List[str]:
+    """Personas that sat on a meeting (its proposers for meetings that predate panels)"""
+    return meeting.get('personas') or [idea['persona_id'] for idea in meeting.get('ideas', [])]
+
+
+def _empty_persona_stats() -> Dict[str, float]:
+    return {"given_sum": 0.0, "given_count": 0, "received_sum": 0.0, "received_count": 0, "wins": 0, "meetings": 0}
+
+
+def meeting_increments(meeting: Dict, known_order: List[str]) -> Dict[str, float]:
+    """$inc document that folds one completed meeting into the materialized stats"""
+    idea_rows = [idea for idea in meeting.get('ideas', []) if has_numeric_score(idea)]
+    persona_ids = order_persona_ids(
+        [s['persona_id'] for idea in idea_rows for s in idea['scores']],
+        known_order
+    )
+    inc: Dict[str, float] = {"meetings": 1}
+    for pid in set(meeting_panel(meeting)):
+        inc[f"personas.{pid}.meetings"] = 1
+
+    for idea in idea_rows:
+        proposer = idea['persona_id']
+        inc[f"personas.{proposer}.received_sum"] = inc.get(f"personas.{proposer}.received_sum", 0) + float(idea['average_score'])
+        inc[f"personas.{proposer}.received_count"] = inc.get(f"personas.{proposer}.received_count", 0) + 1
+        for entry in idea['scores']:
+            if entry.get('score') is None:
+                continue
+            scorer = entry['persona_id']
+            inc[f"personas.{scorer}.given_sum"] = inc.get(f"personas.{scorer}.given_sum", 0) + float(entry['score'])
+            inc[f"personas.{scorer}.given_count"] = inc.get(f"personas.{scorer}.given_count", 0) + 1
+            inc[f"score_matrix.{scorer}.{proposer}.sum"] = inc.get(f"score_matrix.{scorer}.{proposer}.sum", 0) + float(entry['score'])
+            inc[f"score_matrix.{scorer}.{proposer}.count"] = inc.get(f"score_matrix.{scorer}.{proposer}.count", 0) + 1
+
+    winner = ((meeting.get('final_report') or {}).get('winning_idea') or {}).get('persona_id')
+    if winner:
+        inc[f"personas.{winner}.wins"] = 1
+
+    sums = pairwise_sums(build_score_matrix(idea_rows, persona_ids))
+    for i, a in enumerate(persona_ids):
+        for j, b in enumerate(persona_ids):
+            if sums['pair_count'][i, j]:
+                inc[f"pairs.{a}.{b}.n"] = float(sums['pair_count'][i, j])
+                inc[f"pairs.{a}.{b}.abs_diff"] = float(sums['abs_diff'][i, j])
+    return inc
+
+
+async def record_meeting(db, meeting: Dict, known_order: List[str]) -> bool:
+    """Incrementally apply a finalized meeting to the analytics collection"""
+    applied = await db.meetings.count_documents({"id": meeting['id'], "analytics_applied": True})
+    if applied:
+        return False
+
+    # Mark the meeting only once its stats are in, so a failed $inc is retried on the
+    # next finalize rather than lost; /analytics/refresh settles any concurrent double count
+    await db.analytics.update_one(
+        {"_id": STATS_DOC_ID},
+        {"$inc": meeting_increments(meeting, known_order), "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    await db.meetings.update_one({"id": meeting['id']}, {"$set": {"analytics_applied": True}})
+    return True
+
+
+async def rebuild(db, known_order: List[str]) -> Dict:
+    """Recompute the materialized stats from every completed meeting"""
+    # Pin the set of meetings up front so only those are marked as applied afterwards
+    meeting_ids = await db.meetings.distinct("id", COMPLETED_MATCH['$match'])
+    scope = {"$match": {"id": {"$in": meeting_ids}}}
+    idea_rows = await db.meetings.aggregate([scope, *IDEA_SCORES_PIPELINE]).to_list(length=None)
+    wins = await db.meetings.aggregate([scope, *WINS_PIPELINE]).to_list(length=None)
+    panels = await db.meetings.aggregate([scope, *PANEL_PIPELINE]).to_list(length=None)
+    meeting_count = len(meeting_ids)
+
+    persona_ids = order_persona_ids(
+        [s['persona_id'] for idea in idea_rows for s in idea['scores']] + [r['proposer'] for r in idea_rows],
+        known_order
+    )
+    matrix = build_score_matrix(idea_rows, persona_ids)
+    sums = pairwise_sums(matrix)
+
+    personas: Dict[str, Dict] = {pid: {
+        **_empty_persona_stats(),
+        "given_sum": float(np.nansum(matrix[:, i])),
+        "given_count": int(np.count_nonzero(~np.isnan(matrix[:, i])))
+    } for i, pid in enumerate(persona_ids)}
+    score_cells: Dict[str, Dict] = {}
+    for idea in idea_rows:
+        personas[idea['proposer']]['received_sum'] += float(idea['average_score'])
+        personas[idea['proposer']]['received_count'] += 1
+        for entry in idea['scores']:
+            if entry.get('score') is None:
+                continue
+            cell = score_cells.setdefault(entry['persona_id'], {}).setdefault(idea['proposer'], {"sum": 0.0, "count": 0})
+            cell['sum'] += float(entry['score'])
+            cell['count'] += 1
+    # A winner may have neither scored nor received a numeric score; keep its win,
+    # as the incremental update does
+    for row in wins:
+        if row['_id']:
+            personas.setdefault(row['_id'], _empty_persona_stats())['wins'] = row['wins']
+    for row in panels:
+        personas.setdefault(row['_id'], _empty_persona_stats())['meetings'] = row['meetings']
+
+    pairs: Dict[str, Dict] = {}
+    for i, a in enumerate(persona_ids):
+        for j, b in enumerate(persona_ids):
+            if sums['pair_count'][i, j]:
+                pairs.setdefault(a, {})[b] = {
+                    "n": float(sums['pair_count'][i, j]),
+                    "abs_diff": float(sums['abs_diff'][i, j])
+                }
+
+    doc = {
+        "meetings": meeting_count,
+        "personas": personas,
+        "pairs": pairs,
+        "score_matrix": score_cells,
+        "updated_at": datetime.utcnow()
+    }
+    await db.analytics.replace_one({"_id": STATS_DOC_ID}, doc, upsert=True)
+    await db.meetings.update_many(scope['$match'], {"$set": {"analytics_applied": True}})
+    return doc
+
+
+async def _load_stats(db) -> Dict:
+    return await db.analytics.find_one({"_id": STATS_DOC_ID}) or {"meetings": 0, "personas": {}, "pairs": {}, "score_matrix": {}}
+
+
+async def leaderboard(db, personas: Dict[str, Dict]) -> Dict:
+    """Per-persona averages given and received, wins and win rate"""
+    stats = await _load_stats(db)
+    rows = []
+    for pid, s in stats.get('personas', {}).items():
+        given = s.get('given_count', 0)
+        received = s.get('received_count', 0)
+        # Personas only sit on some panels, so rate wins against their own meetings
+        sat_on = s.get('meetings', 0)
+        rows.append({
+            "persona_id": pid,
+            "persona_name": personas.get(pid, {}).get('name', pid),
+            "average_score_given": round(s.get('given_sum', 0) / given, 2) if given else None,
+            "average_score_received": round(s.get('received_sum', 0) / received, 2) if received else None,
+            "ideas_scored": received,
+            "wins": s.get('wins', 0),
+            "meetings": sat_on,
+            "win_rate": round(s.get('wins', 0) / sat_on, 4) if sat_on else 0.0
+        })
+    rows.sort(key=lambda r: (r['average_score_received'] is None, -(r['average_score_received'] or 0)))
+    return {"meetings": stats.get('meetings', 0), "leaderboard": rows, "updated_at": stats.get('updated_at')}
+
+
+async def agreement(db, known_order: List[str]) -> Dict:
+    """Persona x persona agreement matrix from the materialized pair sums"""
+    stats = await _load_stats(db)
+    pairs = stats.get('pairs', {})
+    persona_ids = order_persona_ids(pairs.keys(), known_order)
+    index = {pid: i for i, pid in enumerate(persona_ids)}
+
+    pair_count = np.zeros((len(persona_ids), len(persona_ids)))
+    abs_diff = np.zeros_like(pair_count)
+    for a, row in pairs.items():
+        for b, cell in row.items():
+            if b in index:
+                pair_count[index[a], index[b]] = cell.get('n', 0)
+                abs_diff[index[a], index[b]] = cell.get('abs_diff', 0)
+
+    return {
+        "persona_ids": persona_ids,
+        "agreement": _matrix_to_json(agreement_from_sums(pair_count, abs_diff)),
+        "pair_counts": pair_count.astype(int).tolist(),
+        "meetings": stats.get('meetings', 0),
+        "updated_at": stats.get('updated_at')
+    }
+
+
+async def score_matrix(db, known_order: List[str]) -> Dict:
+    """Mean score each persona gives each proposer, from the materialized scorer/proposer sums"""
+    stats = await _load_stats(db)
+    cells = stats.get('score_matrix', {})
+    persona_ids = order_persona_ids(
+        list(cells) + [proposer for row in cells.values() for proposer in row],
+        known_order
+    )
+    index = {pid: i for i, pid in enumerate(persona_ids)}
+    means = np.full((len(persona_ids), len(persona_ids)), np.nan)
+    counts = np.zeros((len(persona_ids), len(persona_ids)), dtype=int)
+    for scorer, row in cells.items():
+        for proposer, cell in row.items():
+            if cell.get('count'):
+                i, j = index[scorer], index[proposer]
+                means[i, j] = round(cell['sum'] / cell['count'], 2)
+                counts[i, j] = cell['count']
+
+    return {
+        "persona_ids": persona_ids,
+        "rows": "scorer",
+        "columns": "proposer",
+        "mean_scores": _matrix_to_json(means),
+        "counts": counts.tolist()
+    }
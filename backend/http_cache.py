@@ -0,0 +1,119 @@
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+import json
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Conditional GET and pre-compressed JSON bodies for meeting and report reads.
+# Validators come from the meeting's version counter (bumped on every write)
+# and updated_at, so a poll that finds nothing new is answered with a 304.
+
+
+def validators(kind: str, meeting_id: str, stamp: Dict) -> Tuple[str, datetime]:
+    """(ETag, Last-Modified) for a meeting document or one of its sub-resources"""
+    version = stamp.get('version', 0)
+    last_modified = stamp.get('updated_at') or stamp.get('created_at') or datetime(1970, 1, 1)
+    return f'W/"{kind}-{meeting_id}-{version}"', last_modified
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value, usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or etag.removeprefix('W/') in tags
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _cache_headers(etag: str, last_modified: datetime) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": _http_date(last_modified),
+        # Let clients store it but always revalidate: polling turns into 304s
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def not_modified_response(etag: str, last_modified: datetime) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag, last_modified))
+
+
+def _accepted_encodings(request: Request) -> set:
+    accepted = set()
+    for part in request.headers.get('accept-encoding', '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(name.lower())
+    return accepted
+
+
+class EncodedBody:
+    """A JSON body serialized once, with compressed variants built on first request"""
+
+    def __init__(self, payload):
+        self.raw = json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.variants: Dict[str, bytes] = {}
+
+    def encode(self, encoding: str) -> bytes:
+        if encoding not in self.variants:
+            if encoding == 'br':
+                self.variants[encoding] = brotli.compress(self.raw, quality=5)
+            else:
+                self.variants[encoding] = gzip.compress(self.raw, compresslevel=6)
+        return self.variants[encoding]
+
+    def response(self, request: Request, etag: str, last_modified: datetime) -> Response:
+        headers = _cache_headers(etag, last_modified)
+        accepted = _accepted_encodings(request)
+        body = self.raw
+        # Small bodies aren't worth compressing, same threshold as the GZip middleware
+        if len(self.raw) >= 1000:
+            if brotli is not None and 'br' in accepted:
+                body, headers["Content-Encoding"] = self.encode('br'), 'br'
+            elif 'gzip' in accepted:
+                body, headers["Content-Encoding"] = self.encode('gzip'), 'gzip'
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ReportCache:
+    """Small LRU of serialized final reports, keyed by meeting and validated by version"""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[int, EncodedBody]]" = OrderedDict()
+
+    def get(self, meeting_id: str, version: int) -> Optional[EncodedBody]:
+        entry = self.entries.get(meeting_id)
+        if entry is None or entry[0] != version:
+            return None
+        self.entries.move_to_end(meeting_id)
+        return entry[1]
+
+    def put(self, meeting_id: str, version: int, body: EncodedBody) -> None:
+        self.entries[meeting_id] = (version, body)
+        self.entries.move_to_end(meeting_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
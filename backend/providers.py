@@ -0,0 +1,165 @@
+from typing import Callable, Dict, Iterable, NamedTuple
+from abc import ABC, abstractmethod
+import os
+import json
+import asyncio
+import hashlib
+import threading
+
+# Provider Registry
+# Each persona's api_type names a provider. Provider SDKs are imported when the
+# provider is first constructed, never at module load, so worker startup only
+# pays for the providers the roster actually uses.
+
+
+class Completion(NamedTuple):
+    """Reply text plus the token usage the provider reported for the call"""
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class Provider(ABC):
+    """Base class: turn a persona + message into the persona's reply"""
+    name = "base"
+
+    @abstractmethod
+    async def complete(self, persona: Dict, message: str, context: str = "", json_mode: bool = False) -> Completion:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+
+    def __init__(self):
+        import google.generativeai as genai
+        self.genai = genai
+
+    async def complete(self, persona: Dict, message: str, context: str = "", json_mode: bool = False) -> Completion:
+        # Use individual API key for this persona
+        self.genai.configure(api_key=persona['api_key'])
+        model = self.genai.GenerativeModel(persona['model'])
+        full_prompt = f"{persona['system_prompt']}\n\nContext: {context}\n\nUser: {message}"
+        generation_config = {"response_mime_type": "application/json"} if json_mode else None
+        response = await model.generate_content_async(full_prompt, generation_config=generation_config)
+        usage = getattr(response, 'usage_metadata', None)
+        return Completion(
+            response.text,
+            getattr(usage, 'prompt_token_count', 0) or 0,
+            getattr(usage, 'candidates_token_count', 0) or 0
+        )
+
+
+class OpenRouterProvider(Provider):
+    name = "openrouter"
+    url = "https://openrouter.ai/api/v1/chat/completions"
+
+    def __init__(self):
+        import aiohttp
+        self.aiohttp = aiohttp
+        self.api_key = os.environ.get('OPENROUTER_API_KEY')
+        self.session = None
+
+    async def complete(self, persona: Dict, message: str, context: str = "", json_mode: bool = False) -> Completion:
+        # One pooled session per worker instead of one per call
+        if self.session is None or self.session.closed:
+            self.session = self.aiohttp.ClientSession(timeout=self.aiohttp.ClientTimeout(total=30))
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://parliamentarium.app",
+            "X-Title": "Parliamentarium"
+        }
+
+        data = {
+            "model": persona['model'],
+            "messages": [
+                {"role": "system", "content": persona['system_prompt']},
+                {"role": "user", "content": f"{context}\n\n{message}"}
+            ]
+        }
+        if json_mode:
+            data["response_format"] = {"type": "json_object"}
+
+        async with self.session.post(self.url, headers=headers, json=data) as response:
+            if response.status == 200:
+                result = await response.json()
+                usage = result.get('usage') or {}
+                return Completion(
+                    result['choices'][0]['message']['content'],
+                    usage.get('prompt_tokens', 0),
+                    usage.get('completion_tokens', 0)
+                )
+            return Completion(f"[{persona['name']} experienced an OpenRouter error: {response.status}]")
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+
+
+class FakeProvider(Provider):
+    """Deterministic offline provider for local development and tests"""
+    name = "fake"
+
+    async def complete(self, persona: Dict, message: str, context: str = "", json_mode: bool = False) -> Completion:
+        digest = int(hashlib.sha1(f"{persona['name']}|{context}|{message}".encode()).hexdigest(), 16)
+        if json_mode:
+            text = json.dumps({
+                "analysis": f"{persona['name']} weighs the idea through a {persona.get('personality', 'neutral')} lens.",
+                "score": 1 + digest % 10,
+                "reasoning": f"{persona['name']} finds it {'compelling' if digest % 10 >= 5 else 'unconvincing'}."
+            })
+        else:
+            text = f"{persona['name']} proposes idea #{digest % 1000}: act on what the {persona['role']} sees."
+        # Roughly four characters per token, like the real tokenizers
+        prompt = f"{persona['system_prompt']}{context}{message}"
+        return Completion(text, len(prompt) // 4, len(text) // 4)
+
+
+PROVIDER_FACTORIES: Dict[str, Callable[[], Provider]] = {
+    "gemini": GeminiProvider,
+    "openrouter": OpenRouterProvider,
+    "fake": FakeProvider,
+}
+
+_instances: Dict[str, Provider] = {}
+_lock = threading.Lock()
+
+
+def register_provider(name: str, factory: Callable[[], Provider]) -> None:
+    """Add or replace a provider factory; any existing instance is dropped"""
+    with _lock:
+        PROVIDER_FACTORIES[name] = factory
+        _instances.pop(name, None)
+
+
+def get_provider(name: str) -> Provider:
+    """Return the provider for an api_type, importing and constructing it on first use"""
+    provider = _instances.get(name)
+    if provider is not None:
+        return provider
+    with _lock:
+        if name not in _instances:
+            if name not in PROVIDER_FACTORIES:
+                raise KeyError(f"Unknown provider '{name}'")
+            _instances[name] = PROVIDER_FACTORIES[name]()
+        return _instances[name]
+
+
+async def warm_providers(names: Iterable[str]) -> None:
+    """Import and construct providers off the event loop so the first request doesn't pay for it"""
+    for name in set(names):
+        try:
+            await asyncio.to_thread(get_provider, name)
+        except Exception:
+            # A provider that can't load will surface the error on first real use
+            pass
+
+
+async def close_providers() -> None:
+    for provider in list(_instances.values()):
+        await provider.close()
@@ -0,0 +1,106 @@
+from typing import Dict, Optional
+from abc import ABC, abstractmethod
+from pymongo import ReturnDocument
+import time
+import random
+import asyncio
+
+# Token buckets keyed by API key. The Mongo limiter refills and consumes in a
+# single findOneAndUpdate using the server clock, so every worker and pod
+# draws from the same per-key budget.
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a bucket can't grant tokens within the caller's max wait"""
+
+
+class TokenBucketLimiter(ABC):
+    def __init__(self, budgets: Dict[str, float], burst: Optional[Dict[str, float]] = None, max_wait: float = 120.0):
+        # budgets: requests per minute per bucket prefix (api_type)
+        self.budgets = budgets
+        self.burst = burst or {}
+        self.max_wait = max_wait
+
+    def limits(self, key: str):
+        """(capacity, tokens per second) for a bucket, or None when unlimited"""
+        prefix = key.split(':', 1)[0]
+        rpm = self.budgets.get(prefix)
+        if not rpm:
+            return None
+        return self.burst.get(prefix, rpm), rpm / 60.0
+
+    @abstractmethod
+    async def _try_acquire(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        """Consume tokens if available; return 0 on success or the seconds to wait"""
+
+    async def acquire(self, key: str, cost: float = 1.0) -> None:
+        limits = self.limits(key)
+        if limits is None:
+            return
+        capacity, rate = limits
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = await self._try_acquire(key, cost, capacity, rate)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded(f"Rate limit budget for '{key}' exhausted")
+            # Jitter so workers waiting on the same key don't retry in lockstep
+            await asyncio.sleep(wait * random.uniform(1.0, 1.25))
+
+
+class LocalTokenBucketLimiter(TokenBucketLimiter):
+    """Single-process stand-in with the same semantics as the Mongo limiter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets: Dict[str, Dict[str, float]] = {}
+
+    async def _try_acquire(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        now = time.monotonic()
+        bucket = self.buckets.setdefault(key, {"tokens": capacity, "updated_at": now})
+        bucket['tokens'] = min(capacity, bucket['tokens'] + (now - bucket['updated_at']) * rate)
+        bucket['updated_at'] = now
+        if bucket['tokens'] >= cost:
+            bucket['tokens'] -= cost
+            return 0.0
+        return (cost - bucket['tokens']) / rate
+
+
+class MongoTokenBucketLimiter(TokenBucketLimiter):
+    """Cluster-wide buckets stored one document per key in a Mongo collection"""
+
+    def __init__(self, collection, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.collection = collection
+
+    @staticmethod
+    def _update_pipeline(cost: float, capacity: float, rate: float):
+        elapsed_ms = {"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}
+        return [
+            {"$set": {
+                "tokens": {"$min": [capacity, {"$add": [
+                    {"$ifNull": ["$tokens", capacity]},
+                    {"$multiply": [elapsed_ms, rate / 1000.0]}
+                ]}]},
+                "updated_at": "$$NOW"
+            }},
+            {"$set": {"granted": {"$gte": ["$tokens", cost]}}},
+            {"$set": {"tokens": {"$cond": ["$granted", {"$subtract": ["$tokens", cost]}, "$tokens"]}}}
+        ]
+
+    async def _try_acquire(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        bucket = await self.collection.find_one_and_update(
+            {"_id": key},
+            self._update_pipeline(cost, capacity, rate),
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket['granted']:
+            return 0.0
+        return (cost - bucket['tokens']) / rate
+
+
+def bucket_key(api_type: str, persona: Dict) -> str:
+    """Bucket per API key; keys are identified by their env var name, never their value"""
+    return f"{api_type}:{persona.get('api_key_env') or 'default'}"
@@ -0,0 +1,156 @@
+from typing import List, Dict, Optional
+from string import Formatter
+from pathlib import Path
+import os
+import asyncio
+import logging
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Fields each prompt template may reference
+TEMPLATE_FIELDS = {
+    "idea": {"topic", "description"},
+    "score": {"idea", "proposer", "context", "format_instructions"},
+    "report_context": {"topic", "winner_idea", "winner_score", "other_ideas"},
+    "implementation": {"context", "persona_name"},
+    "questions": {"context", "persona_name"},
+}
+
+PERSONA_FIELDS = ("name", "role", "system_prompt", "api_type", "model")
+
+CONFIG_DOC_ID = "roster"
+
+
+class PromptTemplate:
+    """A str.format template parsed once into literal/field segments"""
+
+    def __init__(self, name: str, source: str, allowed_fields: set):
+        self.name = name
+        self.source = source
+        self.segments = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if field is not None:
+                if spec or conversion:
+                    raise ValueError(f"Template '{name}': format specs are not supported ({{{field}}})")
+                if field not in allowed_fields:
+                    raise ValueError(f"Template '{name}': unknown field '{field}'")
+            self.segments.append((literal, field))
+
+    def render(self, **values) -> str:
+        return "".join(
+            literal + (str(values[field]) if field is not None else "")
+            for literal, field in self.segments
+        )
+
+
+class Roster:
+    """An immutable, validated snapshot of personas and compiled prompts"""
+
+    def __init__(self, personas: Dict[str, Dict], prompts: Dict[str, PromptTemplate], report: Dict,
+                 pricing: Dict[str, Dict], version: str):
+        self.personas = personas
+        self.prompts = prompts
+        self.report = report
+        self.pricing = pricing
+        self.version = version
+
+    @classmethod
+    def from_config(cls, raw: Dict, version: str) -> "Roster":
+        """Validate raw config and compile its templates; raises ValueError on bad config"""
+        personas = {}
+        for persona_id, entry in (raw.get('personas') or {}).items():
+            missing = [f for f in PERSONA_FIELDS if not entry.get(f)]
+            if missing:
+                raise ValueError(f"Persona '{persona_id}' is missing {', '.join(missing)}")
+            persona = dict(entry)
+            if 'api_key_env' in persona:
+                persona['api_key'] = os.environ.get(persona['api_key_env'])
+            personas[persona_id] = persona
+        if not personas:
+            raise ValueError("Roster has no personas")
+
+        prompts = {}
+        for name, allowed in TEMPLATE_FIELDS.items():
+            source = (raw.get('prompts') or {}).get(name)
+            if not source:
+                raise ValueError(f"Missing prompt template '{name}'")
+            prompts[name] = PromptTemplate(name, source, allowed)
+
+        report = dict(raw.get('report') or {})
+        for key in ('implementation_persona', 'questions_persona'):
+            if report.get(key) not in personas:
+                report[key] = next(iter(personas))
+
+        pricing = {model: dict(price) for model, price in (raw.get('pricing') or {}).items()}
+
+        return cls(personas, prompts, report, pricing, version)
+
+    def panel(self, persona_ids: Optional[List[str]] = None) -> List[str]:
+        """A meeting's panel restricted to personas still on the roster (all when unset)"""
+        if not persona_ids:
+            return list(self.personas)
+        return [pid for pid in persona_ids if pid in self.personas]
+
+
+class RosterStore:
+    """Holds the live roster and swaps it when the YAML file or Mongo document changes"""
+
+    def __init__(self, path: Path, source: str = "yaml"):
+        self.path = Path(path)
+        self.source = source
+        self.current = self._load_yaml()
+
+    @property
+    def personas(self) -> Dict[str, Dict]:
+        return self.current.personas
+
+    @property
+    def prompts(self) -> Dict[str, PromptTemplate]:
+        return self.current.prompts
+
+    def panel(self, persona_ids: Optional[List[str]] = None) -> List[str]:
+        return self.current.panel(persona_ids)
+
+    def _yaml_version(self) -> str:
+        stat = self.path.stat()
+        return f"yaml:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _load_yaml(self) -> Roster:
+        version = self._yaml_version()
+        with open(self.path) as f:
+            return Roster.from_config(yaml.safe_load(f), version)
+
+    async def _load_mongo(self, db) -> Optional[Roster]:
+        doc = await db.persona_config.find_one({"_id": CONFIG_DOC_ID})
+        if not doc:
+            return None
+        version = f"mongo:{doc.get('version', doc.get('updated_at'))}"
+        if version == self.current.version:
+            return self.current
+        return Roster.from_config(doc, version)
+
+    async def reload(self, db=None) -> bool:
+        """Reload if the source changed; a bad config is logged and the old roster kept"""
+        try:
+            if self.source == "mongo" and db is not None:
+                roster = await self._load_mongo(db)
+            elif self._yaml_version() != self.current.version:
+                roster = await asyncio.to_thread(self._load_yaml)
+            else:
+                roster = None
+        except Exception as e:
+            logger.error("Keeping roster %s, reload failed: %s", self.current.version, e)
+            return False
+
+        if roster is None or roster is self.current:
+            return False
+        self.current = roster
+        logger.info("Loaded persona roster %s (%d personas)", roster.version, len(roster.personas))
+        return True
+
+    async def watch(self, db=None, interval: float = 5.0) -> None:
+        """Poll the source for changes until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.reload(db)
@@ -0,0 +1,134 @@
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+import re
+import zlib
+import numpy as np
+
+# Opt-in semantic cache for the ideas phase. Topics are embedded locally with a
+# signed hashing vectorizer (word unigrams plus character n-grams, so
+# "transport" and "transportation" still overlap) and kept in a small vector
+# index over past meetings. A close enough match lets a new meeting reuse the
+# earlier panel's ideas instead of fanning out to every persona again.
+
+DIM = 1024
+NGRAM_SIZES = (3, 4, 5)
+DESCRIPTION_WEIGHT = 0.5
+
+# Entries are stamped by each worker's clock before they commit, so one stamped
+# earlier can land after a later one was synced. Every sync re-reads this far
+# back past the watermark to cover clock skew and commit latency.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "into", "is", "it",
+    "of", "on", "or", "our", "that", "the", "this", "to", "we", "what", "with", "need", "should"
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _features(text: str) -> Dict[str, float]:
+    features: Dict[str, float] = {}
+    for word in TOKEN_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        features[word] = features.get(word, 0.0) + 1.0
+        padded = f" {word} "
+        grams = [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+        # Scale so a word's n-grams weigh about as much as the word itself
+        for gram in grams:
+            features[gram] = features.get(gram, 0.0) + 1.0 / np.sqrt(len(grams))
+    return features
+
+
+def _hash_vector(text: str) -> np.ndarray:
+    vector = np.zeros(DIM, dtype=np.float32)
+    features = _features(text)
+    if not features:
+        return vector
+    # crc32 rather than hash(): embeddings must match across processes and restarts
+    hashes = np.array([zlib.crc32(f.encode()) for f in features], dtype=np.uint32)
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    weights = np.sqrt(np.array(list(features.values()), dtype=np.float32))
+    np.add.at(vector, hashes % DIM, signs * weights)
+    return vector
+
+
+def embed(topic: str, description: Optional[str] = None) -> np.ndarray:
+    """Unit-length embedding of a meeting's topic and description"""
+    vector = _hash_vector(topic) + DESCRIPTION_WEIGHT * _hash_vector(description or "")
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class TopicIndex:
+    """In-process vector index over past meetings, synced incrementally from Mongo"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.ids: List[str] = []
+        self.topics: List[str] = []
+        self.matrix = np.zeros((0, DIM), dtype=np.float32)
+        self.synced_until: Optional[datetime] = None
+
+    async def sync(self) -> None:
+        """Pull entries written since the last sync (including other workers' entries)"""
+        query = {"created_at": {"$gte": self.synced_until - SYNC_OVERLAP}} if self.synced_until else {}
+        known = set(self.ids)
+        rows = []
+        async for doc in self.collection.find(query).sort("created_at", 1):
+            self.synced_until = doc['created_at']
+            if doc['_id'] not in known:
+                rows.append(doc)
+        if rows:
+            self.ids.extend(doc['_id'] for doc in rows)
+            self.topics.extend(doc['topic'] for doc in rows)
+            vectors = np.stack([np.frombuffer(doc['embedding'], dtype=np.float32) for doc in rows])
+            self.matrix = np.vstack([self.matrix, vectors])
+
+    async def add(self, meeting_id: str, topic: str, vector: np.ndarray) -> None:
+        await self.collection.replace_one(
+            {"_id": meeting_id},
+            {"topic": topic, "embedding": vector.astype(np.float32).tobytes(), "created_at": datetime.utcnow()},
+            upsert=True
+        )
+
+    async def search(self, vector: np.ndarray, k: int = 5, exclude: Optional[str] = None) -> List[Dict]:
+        """Nearest past meetings by cosine similarity, best first"""
+        await self.sync()
+        if not self.ids:
+            return []
+        similarities = self.matrix @ vector
+        order = np.argsort(-similarities)
+        matches = []
+        for i in order:
+            if self.ids[i] == exclude:
+                continue
+            matches.append({
+                "meeting_id": self.ids[i],
+                "topic": self.topics[i],
+                "similarity": round(float(similarities[i]), 4)
+            })
+            if len(matches) == k:
+                break
+        return matches
+
+
+def reusable_ideas(prior_ideas: List[Dict], panel: List[str], source_id: str) -> Dict[str, Dict]:
+    """Earlier ideas by personas on the new panel, reset for a fresh analysis"""
+    reused = {}
+    for idea in prior_ideas:
+        text = idea.get('idea') or ""
+        # Skip placeholders left by failed provider calls
+        if idea.get('persona_id') not in panel or (text.startswith("[") and " experienced " in text):
+            continue
+        reused[idea['persona_id']] = {
+            "persona_id": idea['persona_id'],
+            "persona_name": idea['persona_name'],
+            "idea": text,
+            "scores": [],
+            "average_score": 0,
+            "discussion": [],
+            "reused_from": source_id
+        }
+    return reused
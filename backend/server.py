@@ -1,141 +1,67 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError, field_validator
 from typing import List, Dict, Optional
 from datetime import datetime
 import os
 import uuid
 import asyncio
 import json
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-import google.generativeai as genai
+import re
 from dotenv import load_dotenv
 from pathlib import Path
+import analytics
+import providers
+from roster import Roster, RosterStore
+from rate_limiter import LocalTokenBucketLimiter, MongoTokenBucketLimiter, bucket_key
+import usage
+from write_buffer import MeetingWriteBuffer
+import http_cache
+import semantic_cache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Initialize APIs
-openrouter_key = os.environ.get('OPENROUTER_API_KEY')
-gemini_keys = [
-    os.environ.get('GEMINI_API_KEY_1'),
-    os.environ.get('GEMINI_API_KEY_2'),
-    os.environ.get('GEMINI_API_KEY_3'),
-    os.environ.get('GEMINI_API_KEY_4'),
-    os.environ.get('GEMINI_API_KEY_5')
-]
+# Initialize APIs (provider SDKs are imported lazily by the provider registry)
+provider_override = os.environ.get('LLM_PROVIDER')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Meeting updates are coalesced and written behind; reads go through it for read-your-writes
+meeting_writes = MeetingWriteBuffer(db.meetings, window=float(os.environ.get('MEETING_WRITE_WINDOW', 0.2)))
+
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
-# Persona Configuration with distributed API keys
-PERSONAS = {
-    "mouse": {
-        "name": "The Mouse",
-        "role": "Historian",
-        "system_prompt": "You are The Mouse, the Historian of the mystical parliament. You anchor discussions in precedent, memory, and recursive lineage. Always reference historical patterns and past outcomes. Keep responses concise but profound.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[0],
-        "personality": "historical"
-    },
-    "dolphin": {
-        "name": "The Dolphin", 
-        "role": "Prognosticator",
-        "system_prompt": "You are The Dolphin, the Prognosticator. You forecast trends and emergent outcomes. Focus on future implications and temporal patterns. Always consider long-term consequences.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[1],
-        "personality": "futuristic"
-    },
-    "patternist": {
-        "name": "The Patternist",
-        "role": "Analyst", 
-        "system_prompt": "You are The Patternist, the Analyst. You find energetic and symbolic loops across systems. Focus on patterns, connections, and systematic analysis.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[2],
-        "personality": "analytical"
-    },
-    "contextualist": {
-        "name": "The Contextualist",
-        "role": "Synthesizer",
-        "system_prompt": "You are The Contextualist, the Synthesizer. You root logic in real-world emotion and ecology. Focus on practical context and emotional resonance.",
-        "api_type": "gemini",
-        "model": "gemini-2.0-flash-exp",
-        "api_key": gemini_keys[3],
-        "personality": "contextual"
-    },
-    "superscholar": {
-        "name": "The Superscholar",
-        "role": "Meta Agent",
-        "system_prompt": "You are The Superscholar, the Meta Agent. You translate across epistemology, cybernetics, and semiotics. Focus on meta-analysis and interdisciplinary connections.",
-        "api_type": "gemini", 
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[4],
-        "personality": "academic"
-    },
-    "diviner": {
-        "name": "The Diviner",
-        "role": "Scryer",
-        "system_prompt": "You are The Diviner, the Scryer. You use symbols and intuition to reveal non-linear truths. Focus on mystical insights and symbolic interpretations.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[0],
-        "personality": "mystical"
-    },
-    "naysayer": {
-        "name": "The Naysayer",
-        "role": "7th Seat",
-        "system_prompt": "You are The Naysayer, the 7th Seat. You challenge assumptions and introduce sacred resistance. Always question premises and present counterarguments.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[1],
-        "personality": "contrarian"
-    },
-    "illustrator": {
-        "name": "The Court Illustrator",
-        "role": "Glyph Scribe",
-        "system_prompt": "You are The Court Illustrator, the Glyph Scribe. You capture meetings as symbolic visual compression. Focus on visual metaphors and artistic interpretation.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[2],
-        "personality": "artistic"
-    },
-    "id": {
-        "name": "The ID",
-        "role": "Primal Flame",
-        "system_prompt": "You are The ID, the Primal Flame. You embody pure instinct and unfiltered want. Focus on immediate desires and primal reactions.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[3],
-        "personality": "impulsive"
-    },
-    "ego": {
-        "name": "The EGO",
-        "role": "Mediator",
-        "system_prompt": "You are The EGO, the Mediator. You balance desire and morality, navigating reality's constraints. Focus on practical solutions and mediation.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[4],
-        "personality": "balanced"
-    },
-    "superego": {
-        "name": "The SUPEREGO",
-        "role": "Moral Sentinel",
-        "system_prompt": "You are The SUPEREGO, the Moral Sentinel. You enforce societal rules and moral imperatives. Focus on ethics and highest standards.",
-        "api_type": "gemini",
-        "model": "gemini-1.5-flash-latest",
-        "api_key": gemini_keys[0],
-        "personality": "ethical"
-    }
+# Serialized, pre-compressed final reports of completed meetings
+report_cache = http_cache.ReportCache(max_entries=int(os.environ.get('REPORT_CACHE_SIZE', 128)))
+VALIDATOR_FIELDS = {"version": 1, "updated_at": 1, "created_at": 1, "status": 1}
+
+# Opt-in reuse of ideas from past meetings on near-identical topics
+topic_index = semantic_cache.TopicIndex(db.topic_index)
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', 0.7))
+
+# Persona roster and prompt templates, hot-reloaded from personas.yaml or Mongo
+roster = RosterStore(
+    Path(os.environ.get('PERSONA_CONFIG', ROOT_DIR / 'personas.yaml')),
+    source=os.environ.get('PERSONA_SOURCE', 'yaml')
+)
+ROSTER_RELOAD_SECONDS = float(os.environ.get('PERSONA_RELOAD_SECONDS', 5))
+
+# Per-key request budgets (requests per minute), shared by all workers through Mongo
+RATE_LIMIT_RPM = {
+    "gemini": float(os.environ.get('GEMINI_RPM', 15)),
+    "openrouter": float(os.environ.get('OPENROUTER_RPM', 60)),
 }
+if os.environ.get('RATE_LIMIT_BACKEND', 'mongo') == 'mongo':
+    limiter = MongoTokenBucketLimiter(db.rate_limits, RATE_LIMIT_RPM)
+else:
+    limiter = LocalTokenBucketLimiter(RATE_LIMIT_RPM)
 
 # Models
 class MeetingSession(BaseModel):
@@ -143,9 +69,18 @@ class MeetingSession(BaseModel):
     topic: str
     description: Optional[str] = None
     proposer: str
+    personas: List[str] = Field(default_factory=list)
+    budget_usd: Optional[float] = None
+    budget_tokens: Optional[int] = None
+    budget_state: str = "full"
+    usage: Dict = Field(default_factory=dict)
+    semantic_cache: bool = False
+    semantic_match: Optional[Dict] = None
     status: str = "active"
     phase: str = "inspiration"
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = 1
     ideas: List[Dict] = Field(default_factory=list)
     current_idea_index: int = 0
     discussion_round: int = 0
@@ -160,6 +95,23 @@ class PersonaResponse(BaseModel):
     reasoning: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+    @field_validator('score')
+    @classmethod
+    def score_in_range(cls, v):
+        if v is not None and not 1 <= v <= 10:
+            raise ValueError('score must be between 1 and 10')
+        return v
+
+    @field_validator('content')
+    @classmethod
+    def strip_content(cls, v):
+        return v.strip()
+
+    @field_validator('reasoning')
+    @classmethod
+    def strip_reasoning(cls, v):
+        return (v.strip() or None) if v is not None else v
+
 class IdeaAnalysis(BaseModel):
     idea_text: str
     persona_responses: List[PersonaResponse]
@@ -170,72 +122,40 @@ class MeetingRequest(BaseModel):
     topic: str
     description: Optional[str] = None
     proposer: str = "Anonymous"
+    personas: Optional[List[str]] = None
+    budget_usd: Optional[float] = Field(default=None, gt=0)
+    budget_tokens: Optional[int] = Field(default=None, gt=0)
+    semantic_cache: bool = False
 
 # LLM Integration Functions
-async def get_persona_response(persona_id: str, message: str, context: str = "") -> str:
-    """Get response from a specific persona"""
+async def get_persona_response(current: Roster, persona_id: str, message: str, context: str = "", json_mode: bool = False) -> str:
+    """Get response from a specific persona, optionally constrained to JSON output"""
+    persona = current.personas[persona_id]
+    api_type = provider_override or persona['api_type']
     try:
-        persona = PERSONAS[persona_id]
-        
-        if persona['api_type'] == 'openrouter':
-            # Direct OpenRouter API call
-            import aiohttp
-            
-            headers = {
-                "Authorization": f"Bearer {openrouter_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://parliamentarium.app",
-                "X-Title": "Parliamentarium"
-            }
-            
-            data = {
-                "model": persona['model'],
-                "messages": [
-                    {"role": "system", "content": persona['system_prompt']},
-                    {"role": "user", "content": f"{context}\n\n{message}"}
-                ]
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers=headers,
-                    json=data,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result['choices'][0]['message']['content']
-                    else:
-                        error_text = await response.text()
-                        return f"[{persona['name']} experienced an OpenRouter error: {response.status}]"
-                        
-        elif persona['api_type'] == 'gemini':
-            # Use individual API key for this persona
-            genai.configure(api_key=persona['api_key'])
-            model = genai.GenerativeModel(persona['model'])
-            full_prompt = f"{persona['system_prompt']}\n\nContext: {context}\n\nUser: {message}"
-            response = await model.generate_content_async(full_prompt)
-            return response.text
-            
+        await limiter.acquire(bucket_key(api_type, persona))
+        provider = providers.get_provider(api_type)
+        completion = await provider.complete(persona, message, context, json_mode=json_mode)
     except Exception as e:
         return f"[{persona['name']} experienced a mystical disturbance: {str(e)}]"
+    
+    ledger = usage.current_ledger.get()
+    if ledger is not None:
+        ledger.record(persona_id, bucket_key(api_type, persona), persona['model'],
+                      completion.prompt_tokens, completion.completion_tokens)
+    return completion.text
 
-async def get_all_persona_ideas(topic: str, description: str) -> List[Dict]:
-    """Phase 1: Get initial ideas from all personas"""
+async def get_all_persona_ideas(current: Roster, topic: str, description: str, panel: List[str]) -> List[Dict]:
+    """Phase 1: Get initial ideas from every persona on the panel"""
     ideas = []
-    tasks = []
-    
-    for persona_id, persona in PERSONAS.items():
-        prompt = f"The parliament seeks your wisdom on: '{topic}'. {description}. Provide ONE specific, actionable idea related to this topic. Keep it concise but innovative."
-        tasks.append(get_persona_response(persona_id, prompt))
+    prompt = current.prompts['idea'].render(topic=topic, description=description)
     
-    responses = await asyncio.gather(*tasks)
+    responses = await asyncio.gather(*[get_persona_response(current, persona_id, prompt) for persona_id in panel])
     
-    for i, (persona_id, response) in enumerate(zip(PERSONAS.keys(), responses)):
+    for persona_id, response in zip(panel, responses):
         ideas.append({
             "persona_id": persona_id,
-            "persona_name": PERSONAS[persona_id]['name'],
+            "persona_name": current.personas[persona_id]['name'],
             "idea": response,
             "scores": [],
             "average_score": 0,
@@ -244,97 +164,129 @@ async def get_all_persona_ideas(topic: str, description: str) -> List[Dict]:
     
     return ideas
 
-async def analyze_idea_with_all_personas(idea: Dict, context: str) -> Dict:
-    """Phase 2: Have all personas analyze and score a specific idea"""
-    tasks = []
-    
-    for persona_id, persona in PERSONAS.items():
-        prompt = f"""
-        The parliament is now evaluating this idea: "{idea['idea']}" (proposed by {idea['persona_name']}).
-        
-        Context: {context}
-        
-        Please:
-        1. Provide your analysis and critique of this idea
-        2. Suggest improvements or concerns
-        3. Rate it on a scale of 1-10 (1=terrible, 10=brilliant)
-        4. Give reasons for your score
-        
-        Format your response as:
-        ANALYSIS: [your analysis]
-        SCORE: [number between 1-10]
-        REASONING: [why you gave this score]
-        """
-        tasks.append(get_persona_response(persona_id, prompt))
-    
-    responses = await asyncio.gather(*tasks)
-    scored_responses = []
-    total_score = 0
-    
-    for i, (persona_id, response) in enumerate(zip(PERSONAS.keys(), responses)):
-        # Parse response to extract score
-        score = 5.0  # default
-        reasoning = response
-        analysis = response
-        
+# Score parsing
+MAX_SCORE_REPAIRS = 1
+
+SCORE_FORMAT_INSTRUCTIONS = """Respond with a single JSON object and nothing else:
+{"analysis": "<your analysis, improvements and concerns>", "score": <number between 1 and 10>, "reasoning": "<why you gave this score>"}"""
+
+# Fallback for models that ignore JSON mode and answer in the labelled format
+LABELLED_SCORE_RE = re.compile(
+    r"(?:ANALYSIS:\s*(?P<analysis>.*?)\s*)?\**SCORE:\s*\**\s*(?P<score>\d+(?:\.\d+)?)(?:\s*/\s*10)?\**\s*(?:REASONING:\s*(?P<reasoning>.*))?",
+    re.DOTALL | re.IGNORECASE
+)
+
+def parse_persona_score(current: Roster, persona_id: str, response: str) -> PersonaResponse:
+    """Parse one persona's scoring answer in a single pass; raises ValueError if unusable"""
+    persona = current.personas[persona_id]
+    start, end = response.find('{'), response.rfind('}')
+    if start != -1 and end > start:
         try:
-            if "SCORE:" in response:
-                parts = response.split("SCORE:")
-                if len(parts) > 1:
-                    score_part = parts[1].split("REASONING:")[0].strip()
-                    score = float(score_part.split()[0])
-                    
-                if "REASONING:" in response:
-                    reasoning = response.split("REASONING:")[1].strip()
-                    
-                if "ANALYSIS:" in response:
-                    analysis = response.split("ANALYSIS:")[1].split("SCORE:")[0].strip()
-        except:
-            pass
-            
-        scored_responses.append({
-            "persona_id": persona_id,
-            "persona_name": PERSONAS[persona_id]['name'],
-            "analysis": analysis,
-            "score": score,
-            "reasoning": reasoning
-        })
-        total_score += score
+            payload = json.loads(response[start:end + 1])
+        except json.JSONDecodeError:
+            payload = None
+    else:
+        payload = None
+
+    if payload is None:
+        match = LABELLED_SCORE_RE.search(response)
+        if not match:
+            raise ValueError("no JSON object or SCORE label found")
+        payload = match.groupdict()
+    if not isinstance(payload, dict) or payload.get('score') is None:
+        raise ValueError("response has no score")
+
+    return PersonaResponse(
+        persona_id=persona_id,
+        name=persona['name'],
+        role=persona['role'],
+        content=payload.get('analysis') or response,
+        score=payload['score'],
+        reasoning=payload.get('reasoning') or None
+    )
+
+def build_repair_prompt(response: str, error: str) -> str:
+    """Short follow-up asking a persona to restate an unparseable score"""
+    return f"""Your previous evaluation could not be read ({error}):
+    {response[:1500]}
+
+    Restate the same evaluation. {SCORE_FORMAT_INSTRUCTIONS}"""
+
+async def score_idea_with_persona(current: Roster, persona_id: str, prompt: str) -> Dict:
+    """Ask one persona to score an idea, re-asking only this persona if the answer is unusable"""
+    response = await get_persona_response(current, persona_id, prompt, json_mode=True)
+    attempts = 0
+    while True:
+        try:
+            parsed = parse_persona_score(current, persona_id, response)
+            return {
+                "persona_id": persona_id,
+                "persona_name": parsed.name,
+                "analysis": parsed.content,
+                "score": parsed.score,
+                "reasoning": parsed.reasoning or parsed.content,
+                "repairs": attempts
+            }
+        except ValueError as e:
+            error = e.errors()[0]['msg'] if isinstance(e, ValidationError) else str(e)
+            if attempts >= MAX_SCORE_REPAIRS:
+                # Keep the text for the record but leave it out of the average
+                return {
+                    "persona_id": persona_id,
+                    "persona_name": current.personas[persona_id]['name'],
+                    "analysis": response,
+                    "score": None,
+                    "reasoning": response,
+                    "repairs": attempts,
+                    "parse_error": error
+                }
+            attempts += 1
+            response = await get_persona_response(
+                current, persona_id, build_repair_prompt(response, error), json_mode=True
+            )
+
+async def analyze_idea_with_all_personas(current: Roster, idea: Dict, context: str, panel: List[str]) -> Dict:
+    """Phase 2: Have every persona on the panel analyze and score a specific idea"""
+    prompt = current.prompts['score'].render(
+        idea=idea['idea'],
+        proposer=idea['persona_name'],
+        context=context,
+        format_instructions=SCORE_FORMAT_INSTRUCTIONS
+    )
+    
+    scored_responses = await asyncio.gather(*[
+        score_idea_with_persona(current, persona_id, prompt) for persona_id in panel
+    ])
+    valid_scores = [r['score'] for r in scored_responses if r['score'] is not None]
     
-    idea['scores'] = scored_responses
-    idea['average_score'] = round(total_score / len(PERSONAS), 2)
+    idea['scores'] = list(scored_responses)
+    idea['average_score'] = round(sum(valid_scores) / len(valid_scores), 2) if valid_scores else 0
     
     return idea
 
-async def generate_final_report(winner_idea: Dict, all_ideas: List[Dict], topic: str) -> Dict:
+async def generate_final_report(winner_idea: Dict, all_ideas: List[Dict], topic: str, compact: bool = False) -> Dict:
     """Phase 4: Generate comprehensive implementation report"""
-    context = f"""
-    The parliament has deliberated on '{topic}' and chosen the winning idea: "{winner_idea['idea']}" 
-    (Score: {winner_idea['average_score']}/10).
-    
-    Other ideas considered: {[{'idea': idea['idea'], 'score': idea['average_score']} for idea in all_ideas if idea != winner_idea]}
-    """
-    
-    # Get comprehensive analysis from key personas
-    ego_prompt = f"""
-    {context}
-    
-    As the EGO, provide a comprehensive implementation report with:
-    1. Executive Summary
-    2. Step-by-step implementation plan
-    3. Resource requirements
-    4. Timeline
-    5. Success metrics
-    """
-    
-    questions_prompt = f"""
-    {context}
+    current = roster.current
+    trim = usage.shorten if compact else (lambda text: text)
+    context = current.prompts['report_context'].render(
+        topic=topic,
+        winner_idea=winner_idea['idea'],
+        winner_score=winner_idea['average_score'],
+        other_ideas=[{'idea': trim(idea['idea']), 'score': idea['average_score']} for idea in all_ideas if idea != winner_idea]
+    )
     
-    Based on the parliament's deliberations, what are the top 5 most important follow-up questions the human should ask to refine this idea further?
-    """
+    # Get comprehensive analysis from the roster's report personas
+    implementer = current.report['implementation_persona']
+    questioner = current.report['questions_persona']
+    implementation_prompt = current.prompts['implementation'].render(
+        context=context, persona_name=current.personas[implementer]['name']
+    )
+    questions_prompt = current.prompts['questions'].render(
+        context=context, persona_name=current.personas[questioner]['name']
+    )
     
-    implementation = await get_persona_response("ego", ego_prompt)
-    questions = await get_persona_response("superscholar", questions_prompt)
+    implementation = await get_persona_response(current, implementer, implementation_prompt)
+    questions = await get_persona_response(current, questioner, questions_prompt)
     
     return {
         "winning_idea": winner_idea,
@@ -345,14 +297,37 @@ async def generate_final_report(winner_idea: Dict, all_ideas: List[Dict], topic:
         "generated_at": datetime.utcnow().isoformat()
     }
 
+# Budget helpers
+def open_ledger(phase: str) -> usage.UsageLedger:
+    """Start recording token usage for the LLM calls made by this request"""
+    ledger = usage.UsageLedger(phase, roster.current.pricing)
+    usage.current_ledger.set(ledger)
+    return ledger
+
+def check_budget(meeting: Dict) -> str:
+    """Stop a meeting that has spent its budget; otherwise say whether to degrade"""
+    state = usage.budget_state(meeting)
+    if state == "exhausted":
+        raise HTTPException(status_code=402, detail="Meeting budget exhausted")
+    return state
+
 # API Endpoints
 @api_router.post("/meetings", response_model=MeetingSession)
 async def create_meeting(request: MeetingRequest):
     """Start a new parliamentary session"""
+    if request.personas is not None:
+        unknown = [pid for pid in request.personas if pid not in roster.personas]
+        if unknown or not request.personas:
+            raise HTTPException(status_code=400, detail=f"Unknown personas: {unknown}" if unknown else "Panel cannot be empty")
+    
     session = MeetingSession(
         topic=request.topic,
         description=request.description,
-        proposer=request.proposer
+        proposer=request.proposer,
+        personas=list(dict.fromkeys(request.personas)) if request.personas else list(roster.personas),
+        budget_usd=request.budget_usd,
+        budget_tokens=request.budget_tokens,
+        semantic_cache=request.semantic_cache
     )
     
     # Store in database
@@ -361,60 +336,107 @@ async def create_meeting(request: MeetingRequest):
     return session
 
 @api_router.get("/meetings/{session_id}")
-async def get_meeting(session_id: str):
-    """Get meeting details"""
-    meeting = await db.meetings.find_one({"id": session_id}, {"_id": 0})
+async def get_meeting(session_id: str, request: Request):
+    """Get meeting details (supports ETag / If-Modified-Since revalidation)"""
+    stamp = await meeting_writes.find_one(session_id, VALIDATOR_FIELDS)
+    if not stamp:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    etag, last_modified = http_cache.validators("meeting", session_id, stamp)
+    if http_cache.is_not_modified(request, etag, last_modified):
+        return http_cache.not_modified_response(etag, last_modified)
+    
+    meeting = await meeting_writes.find_one(session_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    return meeting
+    etag, last_modified = http_cache.validators("meeting", session_id, meeting)
+    return http_cache.EncodedBody(meeting).response(request, etag, last_modified)
 
 @api_router.post("/meetings/{session_id}/start-deliberation")
 async def start_deliberation(session_id: str):
     """Phase 1: Gather initial ideas from all personas"""
-    meeting = await db.meetings.find_one({"id": session_id}, {"_id": 0})
+    meeting = await meeting_writes.find_one(session_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
-    # Get ideas from all personas
-    ideas = await get_all_persona_ideas(meeting['topic'], meeting['description'] or "")
-    
-    # Update meeting
-    await db.meetings.update_one(
-        {"id": session_id},
-        {"$set": {"ideas": ideas, "phase": "analysis", "status": "analyzing"}}
+    state = check_budget(meeting)
+    # One roster snapshot for the whole request, so a hot reload can't drop a persona mid-phase
+    current = roster.current
+    panel = current.panel(meeting.get('personas'))
+    if state == "degraded":
+        panel = usage.degraded_panel(panel)
+    ledger = open_ledger("ideas")
+    
+    # Reuse ideas from a near-identical past topic when the meeting opted in
+    embedding = semantic_cache.embed(meeting['topic'], meeting['description'])
+    reused, match = {}, None
+    if meeting.get('semantic_cache'):
+        nearest = await topic_index.search(embedding, k=1, exclude=session_id)
+        if nearest and nearest[0]['similarity'] >= SEMANTIC_CACHE_THRESHOLD:
+            match = nearest[0]
+            prior = await meeting_writes.find_one(match['meeting_id'], {"ideas": 1})
+            reused = semantic_cache.reusable_ideas((prior or {}).get('ideas', []), panel, match['meeting_id'])
+    
+    # Get ideas from the rest of the meeting's panel
+    fresh = await get_all_persona_ideas(
+        current, meeting['topic'], meeting['description'] or "", [pid for pid in panel if pid not in reused]
     )
+    by_persona = {**reused, **{idea['persona_id']: idea for idea in fresh}}
+    ideas = [by_persona[pid] for pid in panel]
+    if match:
+        match = {**match, "reused_ideas": len(reused)}
+    
+    # Update meeting (end of the ideas phase, so write it through now)
+    meeting_writes.update(
+        session_id,
+        ledger.apply({"$set": {"ideas": ideas, "phase": "analysis", "status": "analyzing",
+                               "budget_state": state, "semantic_match": match}})
+    )
+    await meeting_writes.flush(session_id)
+    await topic_index.add(session_id, meeting['topic'], embedding)
     
-    return {"message": "Deliberation started", "ideas": ideas}
+    return {"message": "Deliberation started", "ideas": ideas, "semantic_match": match}
 
 @api_router.post("/meetings/{session_id}/analyze-idea/{idea_index}")
 async def analyze_idea(session_id: str, idea_index: int):
     """Phase 2: Analyze a specific idea with all personas"""
-    meeting = await db.meetings.find_one({"id": session_id}, {"_id": 0})
+    meeting = await meeting_writes.find_one(session_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
-    if idea_index >= len(meeting['ideas']):
+    if not 0 <= idea_index < len(meeting['ideas']):
         raise HTTPException(status_code=400, detail="Invalid idea index")
     
+    state = check_budget(meeting)
+    current = roster.current
+    panel = current.panel(meeting.get('personas'))
+    considered = [i['idea'] for i in meeting['ideas']]
+    if state == "degraded":
+        # Smaller panel and a shorter context once most of the budget is spent
+        panel = usage.degraded_panel(panel)
+        considered = [usage.shorten(text) for text in considered]
+    ledger = open_ledger("analysis")
+    
     idea = meeting['ideas'][idea_index]
-    context = f"Topic: {meeting['topic']}. All ideas being considered: {[i['idea'] for i in meeting['ideas']]}"
+    context = f"Topic: {meeting['topic']}. All ideas being considered: {considered}"
     
-    # Analyze idea with all personas
-    analyzed_idea = await analyze_idea_with_all_personas(idea, context)
+    # Analyze idea with the meeting's panel
+    analyzed_idea = await analyze_idea_with_all_personas(current, idea, context, panel)
     
-    # Update meeting
-    meeting['ideas'][idea_index] = analyzed_idea
-    await db.meetings.update_one(
-        {"id": session_id},
-        {"$set": {"ideas": meeting['ideas'], "current_idea_index": idea_index + 1}}
+    # Update only this idea; the last idea closes the analysis phase and is written through
+    meeting_writes.update(
+        session_id,
+        ledger.apply({"$set": {f"ideas.{idea_index}": analyzed_idea, "current_idea_index": idea_index + 1, "budget_state": state}})
     )
+    if idea_index == len(meeting['ideas']) - 1:
+        await meeting_writes.flush(session_id)
     
     return {"message": f"Idea {idea_index + 1} analyzed", "analyzed_idea": analyzed_idea}
 
 @api_router.post("/meetings/{session_id}/finalize")
 async def finalize_meeting(session_id: str):
     """Phase 3 & 4: Select winner and generate final report"""
-    meeting = await db.meetings.find_one({"id": session_id}, {"_id": 0})
+    meeting = await meeting_writes.find_one(session_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
@@ -422,28 +444,122 @@ async def finalize_meeting(session_id: str):
     ideas = meeting['ideas']
     winner = max(ideas, key=lambda x: x['average_score'])
     
+    state = check_budget(meeting)
+    ledger = open_ledger("report")
+    
     # Generate final report
-    final_report = await generate_final_report(winner, ideas, meeting['topic'])
+    final_report = await generate_final_report(winner, ideas, meeting['topic'], compact=state == "degraded")
     
     # Update meeting
-    await db.meetings.update_one(
-        {"id": session_id},
-        {"$set": {"final_report": final_report, "phase": "completed", "status": "completed"}}
+    meeting_writes.update(
+        session_id,
+        ledger.apply({"$set": {"final_report": final_report, "phase": "completed", "status": "completed", "budget_state": state}})
     )
+    await meeting_writes.flush(session_id)
+    
+    # Fold this meeting into the materialized analytics
+    meeting.update({"final_report": final_report, "phase": "completed", "status": "completed"})
+    await analytics.record_meeting(db, meeting, list(roster.personas))
     
     return {"message": "Meeting finalized", "final_report": final_report}
 
 @api_router.get("/meetings/{session_id}/report")
-async def get_final_report(session_id: str):
-    """Get the final comprehensive report"""
-    meeting = await db.meetings.find_one({"id": session_id}, {"_id": 0})
+async def get_final_report(session_id: str, request: Request):
+    """Get the final comprehensive report (cached once the meeting is completed)"""
+    stamp = await meeting_writes.find_one(session_id, VALIDATOR_FIELDS)
+    if not stamp:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    etag, last_modified = http_cache.validators("report", session_id, stamp)
+    cached = report_cache.get(session_id, stamp.get('version', 0))
+    if cached is not None and http_cache.is_not_modified(request, etag, last_modified):
+        return http_cache.not_modified_response(etag, last_modified)
+    if cached is not None:
+        return cached.response(request, etag, last_modified)
+    
+    meeting = await meeting_writes.find_one(session_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
     if not meeting.get('final_report'):
         raise HTTPException(status_code=400, detail="Meeting not yet finalized")
     
-    return meeting['final_report']
+    etag, last_modified = http_cache.validators("report", session_id, meeting)
+    body = http_cache.EncodedBody(meeting['final_report'])
+    if meeting.get('status') == "completed":
+        report_cache.put(session_id, meeting.get('version', 0), body)
+    if http_cache.is_not_modified(request, etag, last_modified):
+        return http_cache.not_modified_response(etag, last_modified)
+    return body.response(request, etag, last_modified)
+
+@api_router.get("/meetings/{session_id}/similar")
+async def get_similar_meetings(session_id: str, k: int = 5):
+    """Past meetings on the nearest topics, offered as seeds for this one"""
+    meeting = await meeting_writes.find_one(session_id, {"topic": 1, "description": 1})
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    embedding = semantic_cache.embed(meeting['topic'], meeting.get('description'))
+    matches = await topic_index.search(embedding, k=max(1, min(k, 50)), exclude=session_id)
+    for m in matches:
+        m['above_threshold'] = m['similarity'] >= SEMANTIC_CACHE_THRESHOLD
+    return {"threshold": SEMANTIC_CACHE_THRESHOLD, "matches": matches}
+
+@api_router.get("/meetings/{session_id}/usage")
+async def get_meeting_usage(session_id: str):
+    """Token usage and cost by phase, persona and key, against the meeting's budget"""
+    meeting = await meeting_writes.find_one(session_id)
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    return {
+        "usage": meeting.get('usage', {}),
+        "budget_usd": meeting.get('budget_usd'),
+        "budget_tokens": meeting.get('budget_tokens'),
+        "budget_state": usage.budget_state(meeting),
+        "spent": usage.spent(meeting),
+        "throughput": usage.throughput(meeting)
+    }
+
+# Analytics Endpoints
+@api_router.get("/analytics/leaderboard")
+async def get_persona_leaderboard():
+    """Which personas score highest or lowest and how often their ideas win"""
+    return await analytics.leaderboard(db, roster.personas)
+
+@api_router.get("/analytics/agreement")
+async def get_persona_agreement():
+    """Persona x persona agreement matrix from the materialized stats"""
+    return await analytics.agreement(db, list(roster.personas))
+
+@api_router.get("/analytics/score-matrix")
+async def get_score_matrix():
+    """Mean score each persona gives each proposing persona"""
+    return await analytics.score_matrix(db, list(roster.personas))
+
+@api_router.post("/analytics/refresh")
+async def refresh_analytics():
+    """Rebuild the materialized analytics from every completed meeting"""
+    stats = await analytics.rebuild(db, list(roster.personas))
+    return {"message": "Analytics rebuilt", "meetings": stats['meetings']}
+
+# Roster Endpoints
+@api_router.get("/personas")
+async def list_personas():
+    """The current persona roster, for choosing a meeting's panel"""
+    return {
+        "version": roster.current.version,
+        "personas": [
+            {"id": pid, "name": p['name'], "role": p['role'], "personality": p.get('personality')}
+            for pid, p in roster.personas.items()
+        ]
+    }
+
+@api_router.post("/personas/reload")
+async def reload_personas():
+    """Re-read the roster source now instead of waiting for the next poll"""
+    changed = await roster.reload(db)
+    return {"reloaded": changed, "version": roster.current.version}
 
 @api_router.get("/")
 async def root():
@@ -458,8 +574,26 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+
+@app.on_event("startup")
+async def warm_llm_providers():
+    # Import provider SDKs in the background instead of at module load
+    api_types = [provider_override] if provider_override else [p['api_type'] for p in roster.personas.values()]
+    app.state.provider_warmup = asyncio.create_task(providers.warm_providers(api_types))
+
+@app.on_event("startup")
+async def watch_persona_roster():
+    await roster.reload(db)
+    app.state.roster_watch = asyncio.create_task(roster.watch(db, ROSTER_RELOAD_SECONDS))
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    app.state.roster_watch.cancel()
+    await providers.close_providers()
+    try:
+        await meeting_writes.close()
+    finally:
+        client.close()
\ No newline at end of file
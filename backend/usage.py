@@ -0,0 +1,87 @@
+from typing import Dict, Optional
+from contextvars import ContextVar
+import math
+
+# Per-meeting token and cost accounting. Each phase endpoint opens a ledger in
+# a context variable; get_persona_response records every call into it, and the
+# endpoint folds the totals onto the meeting with $inc in the same update that
+# stores the phase's results.
+
+# Spend fraction at which a meeting switches to the cheaper pipeline
+DEGRADE_AT = 0.7
+MIN_DEGRADED_PANEL = 3
+DEGRADED_CONTEXT_CHARS = 160
+
+
+class UsageLedger:
+    def __init__(self, phase: str, pricing: Dict[str, Dict]):
+        self.phase = phase
+        self.pricing = pricing
+        self.increments: Dict[str, float] = {}
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """USD cost from the roster's per-million-token prices (0 for unpriced models)"""
+        price = self.pricing.get(model) or {}
+        return (prompt_tokens * price.get('input', 0) + completion_tokens * price.get('output', 0)) / 1_000_000
+
+    def record(self, persona_id: str, key: str, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+        for scope in ("total", f"by_phase.{self.phase}", f"by_persona.{persona_id}", f"by_key.{key}"):
+            for field, value in (("calls", 1), ("prompt_tokens", prompt_tokens),
+                                 ("completion_tokens", completion_tokens), ("cost_usd", cost)):
+                path = f"usage.{scope}.{field}"
+                self.increments[path] = self.increments.get(path, 0) + value
+
+    def apply(self, update: Dict) -> Dict:
+        """Add this ledger's totals to a Mongo update document as $inc"""
+        if self.increments:
+            update["$inc"] = dict(self.increments)
+        return update
+
+
+current_ledger: ContextVar[Optional[UsageLedger]] = ContextVar("current_ledger", default=None)
+
+
+def spent(meeting: Dict) -> Dict[str, float]:
+    total = (meeting.get('usage') or {}).get('total') or {}
+    return {
+        "cost_usd": total.get('cost_usd', 0.0),
+        "tokens": total.get('prompt_tokens', 0) + total.get('completion_tokens', 0)
+    }
+
+
+def budget_state(meeting: Dict) -> str:
+    """'full', 'degraded' or 'exhausted' depending on how much of the budget is spent"""
+    used = spent(meeting)
+    fractions = []
+    if meeting.get('budget_usd'):
+        fractions.append(used['cost_usd'] / meeting['budget_usd'])
+    if meeting.get('budget_tokens'):
+        fractions.append(used['tokens'] / meeting['budget_tokens'])
+    if not fractions:
+        return "full"
+    if max(fractions) >= 1.0:
+        return "exhausted"
+    if max(fractions) >= DEGRADE_AT:
+        return "degraded"
+    return "full"
+
+
+def degraded_panel(panel: list) -> list:
+    """Keep the first half of the panel (at least MIN_DEGRADED_PANEL personas)"""
+    return panel[:max(MIN_DEGRADED_PANEL, math.ceil(len(panel) / 2))]
+
+
+def shorten(text: str, limit: int = DEGRADED_CONTEXT_CHARS) -> str:
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def throughput(meeting: Dict) -> Dict[str, Optional[float]]:
+    """Scores and ideas produced per dollar spent on the meeting"""
+    cost = spent(meeting)['cost_usd']
+    scores = sum(1 for idea in meeting.get('ideas', []) for s in idea.get('scores', []) if s.get('score') is not None)
+    ideas = len(meeting.get('ideas', []))
+    return {
+        "scores_per_usd": round(scores / cost, 2) if cost else None,
+        "ideas_per_usd": round(ideas / cost, 2) if cost else None
+    }
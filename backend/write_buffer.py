@@ -0,0 +1,212 @@
+from typing import Any, Dict, Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from datetime import datetime
+import copy
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Write-behind buffer for meeting documents. Field updates ($set/$inc on dotted
+# paths) are merged per meeting and written together in one bulk_write, either
+# when the window elapses or when a phase boundary flushes explicitly. Reads in
+# this process go through find_one() so they see writes that are still pending.
+
+# Write errors worth retrying; anything else (a bad path, a validation failure)
+# would fail the same way every time, so those updates are logged and dropped.
+RETRYABLE_WRITE_CODES = {112, 91, 189, 11600, 11602}
+
+
+def _is_within(path: str, parent: str) -> bool:
+    return path == parent or path.startswith(parent + ".")
+
+
+def _step(container, key: str, create: bool):
+    if isinstance(container, list):
+        index = int(key)
+        return container[index] if index < len(container) else None
+    if create and not isinstance(container.get(key), (dict, list)):
+        container[key] = {}
+    return container.get(key)
+
+
+def apply_path(doc: Dict, path: str, value: Any, inc: bool = False) -> None:
+    """Apply one $set (or $inc) on a dotted path to an in-memory document"""
+    *parents, leaf = path.split(".")
+    container = doc
+    for key in parents:
+        container = _step(container, key, create=True)
+        if container is None:
+            return
+    if isinstance(container, list):
+        index = int(leaf)
+        if index < len(container):
+            container[index] = container[index] + value if inc else value
+    elif inc:
+        container[leaf] = container.get(leaf, 0) + value
+    else:
+        container[leaf] = value
+
+
+class PendingUpdate:
+    """Merged, conflict-free $set/$inc for one document"""
+
+    def __init__(self):
+        self.sets: Dict[str, Any] = {}
+        self.incs: Dict[str, float] = {}
+
+    def set(self, path: str, value: Any) -> None:
+        # A set replaces anything pending underneath it
+        for pending in [p for p in self.sets if _is_within(p, path)]:
+            del self.sets[pending]
+        for pending in [p for p in self.incs if _is_within(p, path)]:
+            del self.incs[pending]
+        parent = next((p for p in self.sets if _is_within(path, p)), None)
+        if parent is not None:
+            # Mongo rejects overlapping paths in one update, so fold into the parent's value
+            apply_path(self.sets[parent], path[len(parent) + 1:], copy.deepcopy(value))
+        else:
+            self.sets[path] = copy.deepcopy(value)
+
+    def inc(self, path: str, amount: float) -> None:
+        parent = next((p for p in self.sets if _is_within(path, p)), None)
+        if parent is not None:
+            apply_path(self.sets[parent], path[len(parent) + 1:], amount, inc=True)
+        else:
+            self.incs[path] = self.incs.get(path, 0) + amount
+
+    def merge(self, newer: "PendingUpdate") -> None:
+        for path, value in newer.sets.items():
+            self.set(path, value)
+        for path, amount in newer.incs.items():
+            self.inc(path, amount)
+
+    def to_update(self) -> Dict:
+        update = {}
+        if self.sets:
+            update["$set"] = self.sets
+        if self.incs:
+            update["$inc"] = self.incs
+        return update
+
+    def apply_to(self, doc: Dict) -> None:
+        for path in sorted(self.sets, key=lambda p: p.count(".")):
+            apply_path(doc, path, copy.deepcopy(self.sets[path]))
+        for path, amount in self.incs.items():
+            apply_path(doc, path, amount, inc=True)
+
+
+class MeetingWriteBuffer:
+    def __init__(self, collection, window: float = 0.2):
+        self.collection = collection
+        self.window = window
+        self.pending: Dict[str, PendingUpdate] = {}
+        # Per-meeting locks (with user counts) so a read never races a flush of the same meeting
+        self._locks: Dict[str, list] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    def update(self, meeting_id: str, update: Dict) -> None:
+        """Queue a {'$set': ..., '$inc': ...} update for a meeting"""
+        entry = self.pending.setdefault(meeting_id, PendingUpdate())
+        for path, value in update.get("$set", {}).items():
+            entry.set(path, value)
+        for path, amount in update.get("$inc", {}).items():
+            entry.inc(path, amount)
+        # Every write bumps the version that ETags and Last-Modified are derived from
+        entry.inc("version", 1)
+        entry.set("updated_at", datetime.utcnow())
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush_in_background)
+
+    def _flush_in_background(self) -> None:
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        # Already logged by flush(); retrieve it so asyncio doesn't warn on every tick
+        if not task.cancelled():
+            task.exception()
+
+    async def _acquire(self, meeting_id: str) -> None:
+        entry = self._locks.setdefault(meeting_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        await entry[0].acquire()
+
+    def _release(self, meeting_id: str) -> None:
+        entry = self._locks[meeting_id]
+        entry[0].release()
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._locks[meeting_id]
+
+    async def flush(self, meeting_id: Optional[str] = None) -> int:
+        """Write pending updates (for one meeting, or all) in a single bulk_write"""
+        ids = sorted([meeting_id] if meeting_id is not None else self.pending)
+        if not any(mid in self.pending for mid in ids):
+            return 0
+        for mid in ids:
+            await self._acquire(mid)
+        try:
+            batch = {mid: self.pending.pop(mid) for mid in ids if mid in self.pending}
+            if not batch:
+                return 0
+            order = list(batch)
+            try:
+                await self.collection.bulk_write(
+                    [UpdateOne({"id": mid}, batch[mid].to_update()) for mid in order],
+                    ordered=False
+                )
+            except BulkWriteError as e:
+                # Unordered, so every other op was applied; requeueing them would repeat their $inc
+                failed = {order[err['index']]: err for err in e.details.get('writeErrors', [])}
+                retry = [mid for mid, err in failed.items() if err.get('code') in RETRYABLE_WRITE_CODES]
+                for mid in set(failed) - set(retry):
+                    logger.error("Dropping meeting %s update after write error: %s", mid, failed[mid].get('errmsg'))
+                self._requeue({mid: batch[mid] for mid in retry})
+                raise
+            except ConnectionFailure:
+                self._requeue(batch)
+                logger.exception("Meeting write-behind flush failed; %d updates requeued", len(batch))
+                raise
+            return len(batch)
+        finally:
+            for mid in ids:
+                self._release(mid)
+
+    def _requeue(self, batch: Dict[str, PendingUpdate]) -> None:
+        """Put failed updates back underneath anything queued since"""
+        for mid, entry in batch.items():
+            newer = self.pending.pop(mid, None)
+            if newer is not None:
+                entry.merge(newer)
+            self.pending[mid] = entry
+        if batch:
+            self._schedule()
+
+    async def find_one(self, meeting_id: str, projection: Optional[Dict] = None) -> Optional[Dict]:
+        """Read a meeting with read-your-writes for updates queued in this process"""
+        await self._acquire(meeting_id)
+        try:
+            doc = await self.collection.find_one({"id": meeting_id}, {**(projection or {}), "_id": 0})
+            if doc is not None and meeting_id in self.pending:
+                self.pending[meeting_id].apply_to(doc)
+            return doc
+        finally:
+            self._release(meeting_id)
+
+    async def close(self) -> None:
+        """Flush everything; called on shutdown"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Import-time Benchmark for the Parliamentarium Backend
+Measures how long `import server` takes in a fresh interpreter and checks
+that provider SDKs are not pulled in at module load
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+# Modules that must only be imported lazily by the provider registry
+LAZY_MODULES = ['google.generativeai', 'aiohttp', 'emergentintegrations']
+
+IMPORTTIME_RE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s+server$")
+
+def measure_once():
+    """Cumulative import time of `server` in microseconds, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import server'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.search(line.strip())
+        if match:
+            return int(match.group(1))
+    raise RuntimeError("server not found in -X importtime output")
+
+def eagerly_loaded():
+    """Lazy-only modules that are already in sys.modules after `import server`"""
+    probe = f"import server, sys, json; print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    result = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument('--max-ms', type=float, default=float(os.environ.get('IMPORT_BUDGET_MS', 1500)),
+                        help="fail if the median import time exceeds this")
+    args = parser.parse_args()
+
+    samples = [measure_once() / 1000 for _ in range(args.runs)]
+    median_ms = statistics.median(samples)
+    eager = eagerly_loaded()
+
+    print(f"🏛️ import server: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(samples):.1f}, max {max(samples):.1f}, budget {args.max_ms:.0f})")
+
+    failed = False
+    if median_ms > args.max_ms:
+        print(f"❌ FAIL: import time {median_ms:.1f} ms exceeds budget {args.max_ms:.0f} ms")
+        failed = True
+    if eager:
+        print(f"❌ FAIL: imported at module load: {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("✅ PASS: import time within budget and provider SDKs load lazily")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Shared fixtures for the in-process backend suite.
+
+The app runs against the deterministic `fake` provider, the in-process rate
+limiter and a mongomock-motor database, so nothing here needs a network, a
+live server or a real MongoDB. The Mongo rate limiter's update pipeline is
+unit-tested in Python, and runs against a real server only when TEST_MONGO_URL
+is set.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Must be set before server is imported
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "parliamentarium_test")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["RATE_LIMIT_BACKEND"] = "local"
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+import http_cache  # noqa: E402
+import semantic_cache  # noqa: E402
+import server  # noqa: E402
+from write_buffer import MeetingWriteBuffer  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database wired into every module-level store in server"""
+    database = AsyncMongoMockClient()["parliamentarium_test"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "meeting_writes", MeetingWriteBuffer(database.meetings, window=0.01))
+    monkeypatch.setattr(server, "topic_index", semantic_cache.TopicIndex(database.topic_index))
+    monkeypatch.setattr(server, "report_cache", http_cache.ReportCache())
+    return database
+
+
+@pytest.fixture
+async def api(db):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test/api") as client:
+        yield client
+    await server.meeting_writes.close()
+
+
+@pytest.fixture
+async def meeting(api):
+    """A meeting with a three-persona panel, created but not yet deliberated"""
+    response = await api.post("/meetings", json={
+        "topic": "Sustainable urban transportation",
+        "description": "Reduce congestion and emissions in cities.",
+        "proposer": "Urban Planning Council",
+        "personas": ["mouse", "ego", "superscholar"],
+    })
+    assert response.status_code == 200
+    return response.json()
+
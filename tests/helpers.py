@@ -0,0 +1,14 @@
+"""
+Shared helpers for driving the API in tests.
+"""
+
+
+async def run_meeting(api, meeting_id):
+    """Drive a meeting through every phase the way the frontend does"""
+    ideas = (await api.post(f"/meetings/{meeting_id}/start-deliberation")).json()["ideas"]
+    for index in range(len(ideas)):
+        response = await api.post(f"/meetings/{meeting_id}/analyze-idea/{index}")
+        assert response.status_code == 200
+    response = await api.post(f"/meetings/{meeting_id}/finalize")
+    assert response.status_code == 200
+    return response.json()["final_report"]
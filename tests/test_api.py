@@ -0,0 +1,286 @@
+"""
+Endpoint tests for the Parliamentarium backend, run in-process with
+httpx.AsyncClient against the FastAPI app.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import analytics
+import server
+from tests.helpers import run_meeting
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_root(api):
+    response = await api.get("/")
+    assert response.status_code == 200
+    assert "Parliamentarium" in response.json()["message"]
+
+
+async def test_create_meeting_defaults_to_full_roster(api):
+    response = await api.post("/meetings", json={"topic": "Civic libraries"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["personas"] == list(server.roster.personas)
+    assert body["proposer"] == "Anonymous"
+    assert body["version"] == 1
+
+
+async def test_create_meeting_rejects_unknown_personas(api):
+    response = await api.post("/meetings", json={"topic": "x", "personas": ["mouse", "kraken"]})
+    assert response.status_code == 400
+    assert "kraken" in response.json()["detail"]
+
+
+async def test_create_meeting_rejects_empty_panel(api):
+    response = await api.post("/meetings", json={"topic": "x", "personas": []})
+    assert response.status_code == 400
+
+
+async def test_get_meeting(api, meeting):
+    response = await api.get(f"/meetings/{meeting['id']}")
+    assert response.status_code == 200
+    assert response.json()["topic"] == meeting["topic"]
+    assert response.headers["etag"] == f'W/"meeting-{meeting["id"]}-1"'
+
+
+async def test_get_meeting_not_found(api):
+    assert (await api.get("/meetings/missing")).status_code == 404
+
+
+async def test_get_meeting_conditional(api, meeting):
+    first = await api.get(f"/meetings/{meeting['id']}")
+    etag = first.headers["etag"]
+
+    unchanged = await api.get(f"/meetings/{meeting['id']}", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    since = await api.get(f"/meetings/{meeting['id']}", headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert since.status_code == 304
+
+    await api.post(f"/meetings/{meeting['id']}/start-deliberation")
+    changed = await api.get(f"/meetings/{meeting['id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+async def test_get_meeting_is_compressed(api, meeting):
+    await api.post(f"/meetings/{meeting['id']}/start-deliberation")
+    response = await api.get(f"/meetings/{meeting['id']}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] in ("gzip", "br")
+    assert response.json()["phase"] == "analysis"
+
+
+async def test_start_deliberation(api, meeting):
+    response = await api.post(f"/meetings/{meeting['id']}/start-deliberation")
+    assert response.status_code == 200
+    ideas = response.json()["ideas"]
+    assert [i["persona_id"] for i in ideas] == ["mouse", "ego", "superscholar"]
+    assert all(i["scores"] == [] and i["average_score"] == 0 for i in ideas)
+
+    stored = (await api.get(f"/meetings/{meeting['id']}")).json()
+    assert stored["status"] == "analyzing"
+    assert stored["usage"]["total"]["calls"] == 3
+
+
+async def test_start_deliberation_not_found(api):
+    assert (await api.post("/meetings/missing/start-deliberation")).status_code == 404
+
+
+async def test_analyze_idea(api, meeting):
+    await api.post(f"/meetings/{meeting['id']}/start-deliberation")
+    response = await api.post(f"/meetings/{meeting['id']}/analyze-idea/1")
+    assert response.status_code == 200
+    analyzed = response.json()["analyzed_idea"]
+    assert len(analyzed["scores"]) == 3
+    assert all(1 <= s["score"] <= 10 for s in analyzed["scores"])
+    expected = round(sum(s["score"] for s in analyzed["scores"]) / 3, 2)
+    assert analyzed["average_score"] == expected
+
+    # Read-your-writes through the write-behind buffer
+    stored = (await api.get(f"/meetings/{meeting['id']}")).json()
+    assert stored["ideas"][1]["average_score"] == expected
+    assert stored["current_idea_index"] == 2
+
+
+async def test_analyze_idea_invalid_index(api, meeting):
+    await api.post(f"/meetings/{meeting['id']}/start-deliberation")
+    assert (await api.post(f"/meetings/{meeting['id']}/analyze-idea/3")).status_code == 400
+
+
+async def test_analyze_idea_negative_index(api, meeting):
+    await api.post(f"/meetings/{meeting['id']}/start-deliberation")
+    assert (await api.post(f"/meetings/{meeting['id']}/analyze-idea/-1")).status_code == 400
+    assert (await api.get(f"/meetings/{meeting['id']}")).json()["current_idea_index"] == 0
+
+
+async def test_finalize_and_report(api, meeting):
+    report = await run_meeting(api, meeting["id"])
+    assert report["total_ideas_evaluated"] == 3
+    assert report["final_score"] == report["winning_idea"]["average_score"]
+    assert report["implementation_plan"] and report["follow_up_questions"]
+
+    response = await api.get(f"/meetings/{meeting['id']}/report")
+    assert response.status_code == 200
+    assert response.json()["winning_idea"]["idea"] == report["winning_idea"]["idea"]
+    assert meeting["id"] in server.report_cache.entries
+
+    cached = await api.get(f"/meetings/{meeting['id']}/report", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+
+async def test_report_before_finalize(api, meeting):
+    assert (await api.get(f"/meetings/{meeting['id']}/report")).status_code == 400
+
+
+async def test_report_not_found(api):
+    assert (await api.get("/meetings/missing/report")).status_code == 404
+
+
+async def test_finalize_not_found(api):
+    assert (await api.post("/meetings/missing/finalize")).status_code == 404
+
+
+async def test_usage(api, meeting):
+    await run_meeting(api, meeting["id"])
+    body = (await api.get(f"/meetings/{meeting['id']}/usage")).json()
+    by_phase = body["usage"]["by_phase"]
+    assert by_phase["ideas"]["calls"] == 3
+    assert by_phase["analysis"]["calls"] == 9
+    assert by_phase["report"]["calls"] == 2
+    assert body["usage"]["total"]["cost_usd"] > 0
+    assert body["throughput"]["scores_per_usd"] > 0
+    assert body["budget_state"] == "full"
+
+
+async def test_usage_not_found(api):
+    assert (await api.get("/meetings/missing/usage")).status_code == 404
+
+
+async def test_budget_degrades_then_stops(api, db):
+    created = (await api.post("/meetings", json={"topic": "Tidal energy", "budget_tokens": 10000})).json()
+    ideas = (await api.post(f"/meetings/{created['id']}/start-deliberation")).json()["ideas"]
+    assert len(ideas) == len(server.roster.personas)
+
+    # 75% spent: half the panel scores, with a shortened context
+    await db.meetings.update_one({"id": created["id"]}, {"$set": {"usage.total.prompt_tokens": 7500, "usage.total.completion_tokens": 0}})
+    analyzed = (await api.post(f"/meetings/{created['id']}/analyze-idea/0")).json()["analyzed_idea"]
+    assert len(analyzed["scores"]) == 6
+    assert (await api.get(f"/meetings/{created['id']}")).json()["budget_state"] == "degraded"
+
+    # Over budget: every LLM phase stops
+    await db.meetings.update_one({"id": created["id"]}, {"$set": {"usage.total.prompt_tokens": 10000}})
+    assert (await api.post(f"/meetings/{created['id']}/analyze-idea/1")).status_code == 402
+    assert (await api.post(f"/meetings/{created['id']}/finalize")).status_code == 402
+
+
+async def test_similar_and_semantic_cache(api):
+    first = (await api.post("/meetings", json={"topic": "Sustainable urban transportation"})).json()
+    await api.post(f"/meetings/{first['id']}/start-deliberation")
+
+    second = (await api.post("/meetings", json={
+        "topic": "Sustainable transportation for urban areas",
+        "personas": ["mouse", "dolphin"],
+        "semantic_cache": True,
+    })).json()
+    similar = (await api.get(f"/meetings/{second['id']}/similar")).json()
+    assert similar["matches"][0]["meeting_id"] == first["id"]
+    assert similar["matches"][0]["above_threshold"]
+
+    body = (await api.post(f"/meetings/{second['id']}/start-deliberation")).json()
+    assert body["semantic_match"]["meeting_id"] == first["id"]
+    assert all(idea["reused_from"] == first["id"] for idea in body["ideas"])
+    usage = (await api.get(f"/meetings/{second['id']}/usage")).json()["usage"]
+    assert usage == {}
+
+
+async def test_similar_not_found(api):
+    assert (await api.get("/meetings/missing/similar")).status_code == 404
+
+
+async def test_personas(api):
+    body = (await api.get("/personas")).json()
+    assert [p["id"] for p in body["personas"]] == list(server.roster.personas)
+    assert body["version"].startswith("yaml:")
+
+
+async def test_personas_reload_without_changes(api):
+    body = (await api.post("/personas/reload")).json()
+    assert body == {"reloaded": False, "version": server.roster.current.version}
+
+
+async def test_analytics(api, meeting):
+    await run_meeting(api, meeting["id"])
+
+    leaderboard = (await api.get("/analytics/leaderboard")).json()
+    assert leaderboard["meetings"] == 1
+    assert {row["persona_id"] for row in leaderboard["leaderboard"]} == {"mouse", "ego", "superscholar"}
+    assert sum(row["wins"] for row in leaderboard["leaderboard"]) == 1
+    # Win rates count only the meetings each persona sat on, not every meeting
+    assert all(row["meetings"] == 1 for row in leaderboard["leaderboard"])
+    assert sorted(row["win_rate"] for row in leaderboard["leaderboard"]) == [0.0, 0.0, 1.0]
+
+    agreement = (await api.get("/analytics/agreement")).json()
+    assert agreement["persona_ids"] == ["mouse", "superscholar", "ego"]
+    assert [agreement["agreement"][i][i] for i in range(3)] == [1.0, 1.0, 1.0]
+    assert agreement["pair_counts"][0][1] == 3
+
+    matrix = (await api.get("/analytics/score-matrix")).json()
+    assert matrix["counts"][0] == [1, 1, 1]
+
+    # A rebuild from scratch matches the incremental stats
+    refreshed = (await api.post("/analytics/refresh")).json()
+    assert refreshed["meetings"] == 1
+    assert (await api.get("/analytics/leaderboard")).json()["leaderboard"] == leaderboard["leaderboard"]
+    assert (await api.get("/analytics/agreement")).json()["agreement"] == agreement["agreement"]
+    assert (await api.get("/analytics/score-matrix")).json() == matrix
+
+
+async def test_finalize_twice_counts_analytics_once(api, meeting):
+    await run_meeting(api, meeting["id"])
+    await api.post(f"/meetings/{meeting['id']}/finalize")
+    leaderboard = (await api.get("/analytics/leaderboard")).json()
+    assert leaderboard["meetings"] == 1
+
+
+async def test_failed_analytics_increment_is_retried(api, db, meeting):
+    ideas = (await api.post(f"/meetings/{meeting['id']}/start-deliberation")).json()["ideas"]
+    for index in range(len(ideas)):
+        await api.post(f"/meetings/{meeting['id']}/analyze-idea/{index}")
+    stored = await server.meeting_writes.find_one(meeting["id"])
+    stored.update({"status": "completed", "final_report": {"winning_idea": stored["ideas"][0]}})
+
+    class FailingCollection:
+        async def update_one(self, *args, **kwargs):
+            raise RuntimeError("analytics write failed")
+
+    broken = SimpleNamespace(meetings=db.meetings, analytics=FailingCollection())
+    with pytest.raises(RuntimeError):
+        await analytics.record_meeting(broken, stored, list(server.roster.personas))
+    assert not (await db.meetings.find_one({"id": meeting["id"]})).get("analytics_applied")
+
+    assert await analytics.record_meeting(db, stored, list(server.roster.personas))
+    assert (await api.get("/analytics/leaderboard")).json()["meetings"] == 1
+
+
+async def test_rebuild_keeps_wins_of_unscored_winner(db):
+    # Every score in the meeting failed to parse, so its winner appears in no score row
+    ideas = [
+        {"persona_id": "mouse", "average_score": 0, "scores": [{"persona_id": "ego", "score": None}]},
+        {"persona_id": "ego", "average_score": 0, "scores": [{"persona_id": "ego", "score": None}]},
+    ]
+    meeting = {"id": "m1", "status": "completed", "personas": ["mouse", "ego"], "ideas": ideas,
+               "final_report": {"winning_idea": ideas[0]}}
+    await db.meetings.insert_one(dict(meeting))
+    await analytics.record_meeting(db, meeting, list(server.roster.personas))
+    incremental = await analytics.leaderboard(db, server.roster.personas)
+
+    await analytics.rebuild(db, list(server.roster.personas))
+    rebuilt = await analytics.leaderboard(db, server.roster.personas)
+    summary = [(r["persona_id"], r["wins"], r["meetings"]) for r in rebuilt["leaderboard"]]
+    assert summary == [(r["persona_id"], r["wins"], r["meetings"]) for r in incremental["leaderboard"]]
+    assert summary == [("mouse", 1, 1), ("ego", 0, 1)]
@@ -0,0 +1,120 @@
+"""
+Micro-benchmarks for the CPU-bound hot paths: score parsing, context and
+prompt building, and report assembly/serialization.
+
+Run with `pytest tests/test_benchmarks.py --benchmark-only`; compare runs with
+`--benchmark-autosave` and `--benchmark-compare`. Each benchmark also checks
+its result, so the file doubles as a correctness test when benchmarking is
+disabled.
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import analytics  # noqa: E402
+import http_cache  # noqa: E402
+import semantic_cache  # noqa: E402
+import server  # noqa: E402
+
+PANEL = list(server.roster.personas)
+
+JSON_RESPONSE = json.dumps({
+    "analysis": "A careful reading of precedent suggests this will work in dense districts. " * 8,
+    "score": 7.5,
+    "reasoning": "Historical transit rollouts succeeded when paired with land-use reform. " * 4,
+})
+
+LABELLED_RESPONSE = (
+    "ANALYSIS: " + "The proposal resonates with prior municipal experiments. " * 8
+    + "\nSCORE: 6/10\nREASONING: " + "It underestimates maintenance costs. " * 4
+)
+
+IDEAS = [
+    {
+        "persona_id": pid,
+        "persona_name": server.roster.personas[pid]["name"],
+        "idea": f"{server.roster.personas[pid]['name']} proposes: " + "a detailed, actionable civic plan. " * 12,
+        "average_score": 5 + i % 5,
+        "scores": [
+            {"persona_id": sid, "persona_name": server.roster.personas[sid]["name"],
+             "analysis": "Considered analysis. " * 20, "score": 1 + (i + j) % 10, "reasoning": "Because. " * 10}
+            for j, sid in enumerate(PANEL)
+        ],
+        "discussion": [],
+    }
+    for i, pid in enumerate(PANEL)
+]
+
+
+def test_bench_parse_json_score(benchmark):
+    parsed = benchmark(server.parse_persona_score, server.roster.current, "mouse", JSON_RESPONSE)
+    assert parsed.score == 7.5
+
+
+def test_bench_parse_labelled_score(benchmark):
+    parsed = benchmark(server.parse_persona_score, server.roster.current, "mouse", LABELLED_RESPONSE)
+    assert parsed.score == 6.0
+
+
+def test_bench_score_prompt(benchmark):
+    def build():
+        context = f"Topic: Urban transport. All ideas being considered: {[i['idea'] for i in IDEAS]}"
+        return server.roster.prompts["score"].render(
+            idea=IDEAS[0]["idea"], proposer=IDEAS[0]["persona_name"],
+            context=context, format_instructions=server.SCORE_FORMAT_INSTRUCTIONS
+        )
+
+    prompt = benchmark(build)
+    assert IDEAS[-1]["idea"] in prompt
+
+
+def test_bench_report_context(benchmark):
+    prompts = server.roster.prompts
+    winner = IDEAS[4]
+
+    def build():
+        context = prompts["report_context"].render(
+            topic="Urban transport",
+            winner_idea=winner["idea"],
+            winner_score=winner["average_score"],
+            other_ideas=[{"idea": i["idea"], "score": i["average_score"]} for i in IDEAS if i is not winner],
+        )
+        return prompts["implementation"].render(context=context, persona_name="The EGO")
+
+    prompt = benchmark(build)
+    assert "Executive Summary" in prompt
+
+
+def test_bench_report_serialization(benchmark):
+    report = {
+        "winning_idea": IDEAS[4],
+        "implementation_plan": "Step. " * 800,
+        "follow_up_questions": "Question? " * 100,
+        "final_score": 9,
+        "total_ideas_evaluated": len(IDEAS),
+        "generated_at": "2026-01-01T00:00:00",
+    }
+
+    def assemble():
+        return http_cache.EncodedBody(report).encode("gzip")
+
+    body = benchmark(assemble)
+    assert 0 < len(body) < len(http_cache.EncodedBody(report).raw)
+
+
+def test_bench_meeting_increments(benchmark):
+    meeting = {"id": "m", "ideas": IDEAS, "final_report": {"winning_idea": IDEAS[4]}}
+    inc = benchmark(analytics.meeting_increments, meeting, PANEL)
+    assert inc["meetings"] == 1
+
+
+def test_bench_topic_embedding(benchmark):
+    vector = benchmark(
+        semantic_cache.embed,
+        "How to create a sustainable urban transportation system",
+        "We need innovative solutions for reducing traffic congestion and carbon emissions in cities.",
+    )
+    assert vector.shape == (semantic_cache.DIM,)
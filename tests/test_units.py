@@ -0,0 +1,327 @@
+"""
+Unit tests for the pure helpers behind the endpoints.
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import BulkWriteError
+
+import analytics
+import import_benchmark
+import providers
+import semantic_cache
+import server
+from rate_limiter import LocalTokenBucketLimiter, MongoTokenBucketLimiter, TokenBucketLimiter
+from roster import PromptTemplate, Roster
+from write_buffer import MeetingWriteBuffer, PendingUpdate, apply_path
+
+
+# Score parsing
+def test_parse_json_score():
+    parsed = server.parse_persona_score(server.roster.current, "mouse", json.dumps({"analysis": "Sound", "score": 8, "reasoning": "Precedent"}))
+    assert (parsed.content, parsed.score, parsed.reasoning) == ("Sound", 8.0, "Precedent")
+
+
+def test_parse_json_in_code_fence():
+    parsed = server.parse_persona_score(server.roster.current, "mouse", '```json\n{"analysis": "a", "score": "7.5"}\n```')
+    assert parsed.score == 7.5
+    assert parsed.reasoning is None
+
+
+def test_parse_labelled_fallback():
+    parsed = server.parse_persona_score(server.roster.current, "mouse", "ANALYSIS: Good idea\n**SCORE:** 6/10\nREASONING: Because")
+    assert (parsed.content, parsed.score, parsed.reasoning) == ("Good idea", 6.0, "Because")
+
+
+@pytest.mark.parametrize("response", ["No numbers here", '{"analysis": "x"}', '{"score": 11}', "SCORE: 0"])
+def test_parse_rejects_unusable(response):
+    with pytest.raises(ValueError):
+        server.parse_persona_score(server.roster.current, "mouse", response)
+
+
+@pytest.mark.parametrize("payload", [{"analysis": {"pros": 1}, "score": 7}, {"score": 7, "reasoning": ["a"]}])
+def test_parse_rejects_non_string_text(payload):
+    with pytest.raises(ValueError):
+        server.parse_persona_score(server.roster.current, "mouse", json.dumps(payload))
+
+
+def test_non_string_analysis_is_repaired(monkeypatch):
+    replies = iter(['{"analysis": {"pros": 1}, "score": 7}', '{"analysis": "fixed", "score": 7, "reasoning": "r"}'])
+
+    async def fake_response(current, persona_id, message, context="", json_mode=False):
+        return next(replies)
+
+    monkeypatch.setattr(server, "get_persona_response", fake_response)
+    result = asyncio.run(server.score_idea_with_persona(server.roster.current, "mouse", "prompt"))
+    assert (result["analysis"], result["repairs"]) == ("fixed", 1)
+
+
+def test_failing_persona_is_repaired_once(monkeypatch):
+    calls = []
+
+    async def fake_response(current, persona_id, message, context="", json_mode=False):
+        calls.append(message)
+        return "no score" if len(calls) == 1 else '{"analysis": "fixed", "score": 4, "reasoning": "r"}'
+
+    monkeypatch.setattr(server, "get_persona_response", fake_response)
+    result = asyncio.run(server.score_idea_with_persona(server.roster.current, "mouse", "prompt"))
+    assert result["score"] == 4.0 and result["repairs"] == 1
+    assert "could not be read" in calls[1]
+
+
+def test_unrepairable_score_is_excluded(monkeypatch):
+    async def fake_response(current, persona_id, message, context="", json_mode=False):
+        return "still no score" if persona_id == "mouse" else '{"analysis": "a", "score": 9, "reasoning": "r"}'
+
+    monkeypatch.setattr(server, "get_persona_response", fake_response)
+    idea = {"idea": "x", "persona_name": "The Mouse"}
+    analyzed = asyncio.run(server.analyze_idea_with_all_personas(server.roster.current, idea, "ctx", ["mouse", "ego"]))
+    assert analyzed["average_score"] == 9.0
+    assert analyzed["scores"][0]["score"] is None and "parse_error" in analyzed["scores"][0]
+
+
+def test_scoring_survives_reload_mid_request(monkeypatch):
+    snapshot = server.roster.current
+    reloaded = Roster({pid: p for pid, p in snapshot.personas.items() if pid != "mouse"},
+                      snapshot.prompts, snapshot.report, snapshot.pricing, "reloaded")
+
+    async def fake_response(current, persona_id, message, context="", json_mode=False):
+        # The persona is dropped by a reload while its call is in flight
+        monkeypatch.setattr(server.roster, "current", reloaded)
+        return '{"analysis": "a", "score": 6, "reasoning": "r"}'
+
+    monkeypatch.setattr(server, "get_persona_response", fake_response)
+    result = asyncio.run(server.score_idea_with_persona(snapshot, "mouse", "prompt"))
+    assert (result["persona_name"], result["score"]) == (snapshot.personas["mouse"]["name"], 6.0)
+
+
+# Prompt templates
+def test_prompt_template_renders_and_validates():
+    template = PromptTemplate("idea", "On '{topic}': {description} {{literal}}", {"topic", "description"})
+    assert template.render(topic="T", description="D") == "On 'T': D {literal}"
+    with pytest.raises(ValueError):
+        PromptTemplate("idea", "{unknown}", {"topic"})
+    with pytest.raises(ValueError):
+        PromptTemplate("idea", "{topic!r}", {"topic"})
+
+
+# Write-behind buffer
+def test_pending_update_folds_overlapping_paths():
+    pending = PendingUpdate()
+    pending.set("ideas.1", {"a": 9})
+    pending.inc("usage.total.calls", 2)
+    pending.set("ideas", [{"a": 0}, {"a": 0}])
+    pending.set("ideas.0", {"a": 5})
+    pending.inc("usage.total.calls", 3)
+    assert pending.to_update() == {"$set": {"ideas": [{"a": 5}, {"a": 0}]}, "$inc": {"usage.total.calls": 5}}
+
+
+def test_pending_update_folds_into_dotted_parent():
+    pending = PendingUpdate()
+    pending.set("ideas.3", {"idea": "x", "n": 1})
+    pending.set("ideas.3.scores", [1])
+    pending.inc("ideas.3.n", 2)
+    assert pending.to_update() == {"$set": {"ideas.3": {"idea": "x", "n": 3, "scores": [1]}}}
+
+
+class PartiallyFailingCollection:
+    """Applies every op except those on one meeting, like an unordered bulk_write"""
+
+    def __init__(self, failing_id, code):
+        self.failing_id, self.code = failing_id, code
+        self.applied = []
+
+    async def bulk_write(self, ops, ordered):
+        errors = []
+        for index, op in enumerate(ops):
+            if op._filter["id"] == self.failing_id:
+                errors.append({"index": index, "code": self.code, "errmsg": "cannot use the part"})
+            else:
+                self.applied.append(op._filter["id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": 0})
+
+
+@pytest.mark.parametrize("code, requeued", [(28, False), (112, True)])
+def test_partial_bulk_write_requeues_only_retryable_failures(code, requeued):
+    collection = PartiallyFailingCollection("bad", code)
+    buffer = MeetingWriteBuffer(collection, window=60)
+
+    async def scenario():
+        buffer.update("good", {"$inc": {"usage.calls": 5}})
+        buffer.update("bad", {"$set": {"ideas.-1": {}}})
+        with pytest.raises(BulkWriteError):
+            await buffer.flush()
+        pending = set(buffer.pending)
+        if buffer._timer is not None:
+            buffer._timer.cancel()
+        return pending
+
+    assert asyncio.run(scenario()) == ({"bad"} if requeued else set())
+    assert collection.applied == ["good"]
+
+
+def test_apply_path():
+    doc = {"ideas": [{"scores": []}]}
+    apply_path(doc, "ideas.0.average_score", 7)
+    apply_path(doc, "usage.total.calls", 2, inc=True)
+    apply_path(doc, "usage.total.calls", 1, inc=True)
+    assert doc == {"ideas": [{"scores": [], "average_score": 7}], "usage": {"total": {"calls": 3}}}
+
+
+# Rate limiter
+def test_local_token_bucket_waits_for_refill():
+    limiter = LocalTokenBucketLimiter({"gemini": 600}, burst={"gemini": 2})
+
+    async def acquire_five():
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire("gemini:GEMINI_API_KEY_1")
+        await limiter.acquire("fake:default")
+        return time.monotonic() - start
+
+    # 2 from the burst, then 3 more at 10 per second
+    assert 0.25 <= asyncio.run(acquire_five()) < 1.0
+
+
+class PipelineBucketCollection:
+    """Evaluates MongoTokenBucketLimiter's update pipeline in Python; mongomock can't run $$NOW pipelines"""
+
+    def __init__(self):
+        self.docs = {}
+        self.now = datetime(2026, 1, 1)
+
+    def evaluate(self, expr, doc):
+        if isinstance(expr, str) and expr.startswith("$"):
+            return self.now if expr == "$$NOW" else doc.get(expr[1:])
+        if not isinstance(expr, dict):
+            return expr
+        (op, args), = expr.items()
+        values = [self.evaluate(arg, doc) for arg in args]
+        if op == "$subtract" and isinstance(values[0], datetime):
+            return (values[0] - values[1]).total_seconds() * 1000
+        return {
+            "$min": lambda v: min(v),
+            "$add": lambda v: sum(v),
+            "$multiply": lambda v: v[0] * v[1],
+            "$subtract": lambda v: v[0] - v[1],
+            "$ifNull": lambda v: v[1] if v[0] is None else v[0],
+            "$gte": lambda v: v[0] >= v[1],
+            "$cond": lambda v: v[1] if v[0] else v[2],
+        }[op](values)
+
+    async def find_one_and_update(self, query, pipeline, upsert, return_document):
+        doc = dict(self.docs.get(query["_id"], query))
+        for stage in pipeline:
+            doc.update({field: self.evaluate(expr, doc) for field, expr in stage["$set"].items()})
+        self.docs[query["_id"]] = doc
+        return doc
+
+
+def test_mongo_token_bucket_pipeline():
+    collection = PipelineBucketCollection()
+    limiter = MongoTokenBucketLimiter(collection, {"gemini": 60}, burst={"gemini": 2})
+
+    async def try_acquire():
+        return await limiter._try_acquire("gemini:k", 1.0, *limiter.limits("gemini:k"))
+
+    async def scenario():
+        waits = [await try_acquire() for _ in range(3)]
+        collection.now += timedelta(seconds=1.5)
+        waits.append(await try_acquire())
+        return waits
+
+    # Burst of 2, then a 1s wait at one token per second, then a refill
+    assert asyncio.run(scenario()) == [0.0, 0.0, 1.0, 0.0]
+    assert collection.docs["gemini:k"]["tokens"] == pytest.approx(0.5)
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_MONGO_URL"),
+                    reason="set TEST_MONGO_URL to run the Mongo limiter against a real server")
+def test_mongo_token_bucket_on_real_mongo():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def scenario():
+        client = AsyncIOMotorClient(os.environ["TEST_MONGO_URL"])
+        collection = client["parliamentarium_test"]["rate_limits"]
+        await collection.delete_many({})
+        limiter = MongoTokenBucketLimiter(collection, {"gemini": 60}, burst={"gemini": 2})
+        try:
+            return [await limiter._try_acquire("gemini:k", 1.0, *limiter.limits("gemini:k")) for _ in range(3)]
+        finally:
+            await collection.delete_many({})
+            client.close()
+
+    first, second, third = asyncio.run(scenario())
+    assert first == second == 0.0 and third > 0.9
+
+
+def test_limiter_must_implement_try_acquire():
+    class HalfLimiter(TokenBucketLimiter):
+        pass
+
+    with pytest.raises(TypeError):
+        HalfLimiter({"gemini": 60})
+
+
+# Analytics
+def test_agreement_matrix():
+    ideas = [
+        {"scores": [{"persona_id": "a", "score": 5}, {"persona_id": "b", "score": 7}]},
+        {"scores": [{"persona_id": "a", "score": 3}, {"persona_id": "b", "score": 5}, {"persona_id": "c", "score": None}]},
+    ]
+    sums = analytics.pairwise_sums(analytics.build_score_matrix(ideas, ["a", "b", "c"]))
+    assert sums["pair_count"].tolist() == [[2, 2, 0], [2, 2, 0], [0, 0, 0]]
+    agreement = analytics.agreement_from_sums(**sums)
+    assert agreement[0, 1] == pytest.approx(1 - 2 / 9, abs=1e-4)
+    assert np.isnan(agreement[0, 2])
+
+
+def test_increments_skip_ideas_without_numeric_scores():
+    meeting = {"ideas": [
+        {"persona_id": "a", "average_score": 6, "scores": [{"persona_id": "b", "score": 6}]},
+        {"persona_id": "b", "average_score": 0, "scores": [{"persona_id": "a", "score": None}]},
+    ]}
+    inc = analytics.meeting_increments(meeting, ["a", "b"])
+    assert "personas.b.received_count" not in inc and "personas.a.given_count" not in inc
+    assert inc["personas.a.received_sum"] == 6
+
+
+# Semantic cache
+def test_topic_index_sync_catches_late_commits():
+    collection = AsyncMongoMockClient()["t"]["topic_index"]
+    index = semantic_cache.TopicIndex(collection)
+    vector = semantic_cache.embed("Tidal energy").tobytes()
+    now = datetime.utcnow()
+
+    async def scenario():
+        await collection.insert_one({"_id": "later", "topic": "b", "embedding": vector, "created_at": now})
+        await index.sync()
+        # Stamped before "later" by another worker, but committed after this worker synced
+        await collection.insert_one({"_id": "earlier", "topic": "a", "embedding": vector,
+                                     "created_at": now - timedelta(seconds=5)})
+        await index.sync()
+
+    asyncio.run(scenario())
+    assert index.ids == ["later", "earlier"]
+
+
+# Providers
+def test_provider_must_implement_complete():
+    class HalfProvider(providers.Provider):
+        name = "half"
+
+    with pytest.raises(TypeError):
+        HalfProvider()
+
+
+# Import time
+def test_provider_sdks_load_lazily():
+    assert import_benchmark.eagerly_loaded() == []